@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+"""
+bench_crud.py
+~~~~~~~~~~~~~
+
+Measure the ``crud`` functions (``get``, ``get_id``, ``post``, ``put`` and
+``delete``) and :meth:`BaseMixin.dump` against SQLite, in memory and in a
+file, for tables of different sizes.  This does not need a Postgres server,
+so it can run anywhere.
+
+For each database, table size and operation this reports the operations per
+second, the p50 and p99 latency, and the peak memory allocated (with
+``tracemalloc``) while running the operation.  The results can be saved as
+json, and compared with a previous run to find regressions.
+
+Usage::
+
+    python benchmarks/bench_crud.py --rows 10,1000,100000 --output new.json
+    python benchmarks/bench_crud.py --compare old.json --output new.json
+
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import sqlalchemy
+from sqlalchemy import Column, Integer, String, create_engine
+from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from connexion_sql_utils import BaseMixin, crud
+
+OPERATIONS = ('get', 'get_id', 'post', 'put', 'delete', 'dump')
+
+Session = scoped_session(sessionmaker(autoflush=False,
+                                      expire_on_commit=False))
+
+
+class MyBase(BaseMixin):
+
+    @staticmethod
+    def session_maker():
+        return Session()
+
+
+Base = declarative_base(cls=MyBase)
+
+
+class Bench(Base):
+
+    bar = Column(String(40), nullable=False)
+    num = Column(Integer, nullable=False)
+
+
+def create(db, path):
+    """Create an engine for the ``db`` (``'memory'`` or ``'file'``).
+
+    """
+    if db == 'memory':
+        # one shared connection, so that every session sees the tables.
+        return create_engine('sqlite://', poolclass=StaticPool,
+                             connect_args={'check_same_thread': False})
+    return create_engine('sqlite:///{}'.format(path))
+
+
+def populate(rows, batch=10000):
+    ids = []
+    for start in range(0, rows, batch):
+        items = [{'bar': 'bar-{}'.format(i), 'num': i}
+                 for i in range(start, min(start + batch, rows))]
+        ids.extend(Bench.save_many(items))
+    return ids
+
+
+def operations(ids, rows):
+    """Return a function for each operation, that is called with the index
+    of the call.
+
+    """
+    posted = []
+    instances = Bench.query_by(limit=100).all()
+
+    def get(i):
+        crud.get(Bench, limit=100, offset=random.randint(0, max(rows - 100,
+                                                                0)))
+
+    def get_id(i):
+        crud.get_id(Bench, bench_id=random.choice(ids))
+
+    def post(i):
+        data, _ = crud.post(Bench, bench={'bar': 'new-{}'.format(i),
+                                          'num': i})
+        posted.append(data['id'])
+
+    def put(i):
+        crud.put(Bench, bench_id=random.choice(ids),
+                 bench={'bar': 'put-{}'.format(i)})
+
+    def delete(i):
+        # delete the posted rows, so the table keeps it's size.
+        crud.delete(Bench, bench_id=posted.pop())
+
+    def dump(i):
+        instances[i % len(instances)].dump()
+
+    return {'get': get, 'get_id': get_id, 'post': post, 'put': put,
+            'delete': delete, 'dump': dump}
+
+
+def percentile(latencies, p):
+    index = min(int(round(p / 100.0 * (len(latencies) - 1))),
+                len(latencies) - 1)
+    return latencies[index]
+
+
+def measure(fn, count, memory_count):
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - start)
+
+    # memory is measured in a separate pass, as tracing slows every call.
+    tracemalloc.start()
+    for i in range(count, count + memory_count):
+        fn(i)
+    (_, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'n': count,
+        'ops_per_sec': count / sum(latencies),
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'peak_kib': peak / 1024.0,
+    }
+
+
+def run(dbs, sizes, count, memory_count, ops):
+    results = []
+    for db in dbs:
+        for rows in sizes:
+            with tempfile.TemporaryDirectory() as tmp:
+                engine = create(db, os.path.join(tmp, 'bench.db'))
+                Session.configure(bind=engine)
+                Base.metadata.create_all(bind=engine)
+                try:
+                    ids = populate(rows)
+                    fns = operations(ids, rows)
+                    for op in ops:
+                        result = measure(fns[op], count, memory_count)
+                        result.update(db=db, rows=rows, op=op)
+                        results.append(result)
+                        print('{db:<7}{rows:>8} {op:<7}{ops_per_sec:>12,.0f} '
+                              'ops/sec  p50 {p50_ms:>8.3f} ms  '
+                              'p99 {p99_ms:>8.3f} ms  '
+                              'peak {peak_kib:>9.1f} KiB'.format(**result))
+                finally:
+                    Session.remove()
+                    engine.dispose()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print the change in ops/sec from the ``baseline`` results, and return
+    the number of regressions larger than ``threshold``.
+
+    """
+    previous = {(r['db'], r['rows'], r['op']): r for r in baseline['results']}
+    regressions = 0
+    print('\ncompared with the baseline:')
+    for result in results:
+        old = previous.get((result['db'], result['rows'], result['op']))
+        if old is None:
+            continue
+        change = result['ops_per_sec'] / old['ops_per_sec'] - 1
+        flag = ''
+        if change < -threshold:
+            regressions += 1
+            flag = '  REGRESSION'
+        print('{db:<7}{rows:>8} {op:<7}'.format(**result) +
+              '{:>+8.1%}{}'.format(change, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--db', choices=('memory', 'file', 'both'),
+                        default='both')
+    parser.add_argument('--rows', default='10,100,1000,10000,100000',
+                        help='comma separated table sizes')
+    parser.add_argument('--ops', default=','.join(OPERATIONS),
+                        help='comma separated operations')
+    parser.add_argument('--count', type=int, default=200,
+                        help='timed calls of each operation')
+    parser.add_argument('--memory-count', type=int, default=20,
+                        help='calls of each operation traced for memory')
+    parser.add_argument('--output', help='save the results as json')
+    parser.add_argument('--compare', help='json results to compare with')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='slow down of ops/sec reported as regression')
+    args = parser.parse_args(argv)
+
+    dbs = ('memory', 'file') if args.db == 'both' else (args.db,)
+    sizes = [int(r) for r in args.rows.split(',')]
+    ops = [op for op in args.ops.split(',') if op]
+    unknown = set(ops) - set(OPERATIONS)
+    if unknown:
+        parser.error('unknown operations: {}'.format(', '.join(unknown)))
+    # every post is deleted, so there must be at least as many.
+    if 'delete' in ops and 'post' in ops and \
+            ops.index('delete') < ops.index('post'):
+        parser.error('delete must come after post')
+
+    results = run(dbs, sizes, args.count, args.memory_count, ops)
+    report = {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'sqlalchemy': sqlalchemy.__version__,
+            'platform': platform.platform(),
+            'count': args.count,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+bench_dump.py
+~~~~~~~~~~~~~
+
+Compare the rows per second of :meth:`BaseMixin.dump`, which uses the per
+class dump plan, with the previous implementation that scanned ``dir()`` of
+the instance on every call.
+
+Usage::
+
+    python benchmarks/bench_dump.py [rows]
+
+"""
+import json
+import sys
+import time
+
+from connexion_sql_utils import BaseMixin, to_json, dump_method
+
+
+class Row(BaseMixin):
+
+    def __init__(self, i):
+        self.id = str(i)
+        self.name = 'name-{}'.format(i)
+        self.price = i * 1.5
+        self.count = i
+
+    @to_json('price')
+    def round_price(self, val):
+        return round(val, 1)
+
+    @dump_method
+    def add_kind(self, vals):
+        vals['kind'] = 'row'
+        return vals
+
+
+def legacy_dump(self, _dict=None):
+    """The ``dump`` implementation before the dump plan.
+
+    """
+    dump_dict = _dict or self.dump_dict
+    vals = self._asDict()
+    to_json_funcs = (getattr(self, f) for f in dir(self)
+                     if hasattr(getattr(self, f), '_to_json'))
+
+    for fn in to_json_funcs:
+        for key in fn._keys:
+            if key in vals:
+                vals[key] = fn(vals[key])
+
+    dump_funcs = (getattr(self, f) for f in dir(self)
+                  if hasattr(getattr(self, f), '_dump_method'))
+
+    for fn in dump_funcs:
+        vals = fn(vals)
+
+    return vals if dump_dict is True else json.dumps(vals)
+
+
+def rows_per_second(fn, rows):
+    start = time.perf_counter()
+    for row in rows:
+        fn(row)
+    return len(rows) / (time.perf_counter() - start)
+
+
+def main(count=10000):
+    rows = [Row(i) for i in range(count)]
+    # the encoders differ in whitespace, so compare the decoded values.
+    assert json.loads(legacy_dump(rows[0])) == json.loads(rows[0].dump())
+
+    before = rows_per_second(legacy_dump, rows)
+    after = rows_per_second(Row.dump, rows)
+    print('rows: {}'.format(count))
+    print('before (dir scan):  {:>12,.0f} rows/sec'.format(before))
+    print('after (dump plan):  {:>12,.0f} rows/sec'.format(after))
+    print('speedup:            {:>12.1f}x'.format(after / before))
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+"""
+bench_ids.py
+~~~~~~~~~~~~
+
+Compare the insert throughput of the id strategies of
+:meth:`BaseMixin.new_id` (``uuid4``, ``uuid7`` and ``ulid``), and the size
+of the table and it's indexes after the inserts.  Random ids insert across
+the whole primary key index, the time ordered ids append near it's end.
+
+The rows are inserted with ``save_many`` in batches, into a SQLite file by
+default, or any database uri passed with ``--uri``.
+
+Usage::
+
+    python benchmarks/bench_ids.py --rows 200000
+    python benchmarks/bench_ids.py --uri postgresql+psycopg2://...
+
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import Column, Integer, String, create_engine, text
+from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
+
+from connexion_sql_utils import BaseMixin
+from connexion_sql_utils.ids import STRATEGIES
+
+Session = scoped_session(sessionmaker(autoflush=False,
+                                      expire_on_commit=False))
+
+
+class MyBase(BaseMixin):
+
+    @staticmethod
+    def session_maker():
+        return Session()
+
+
+Base = declarative_base(cls=MyBase)
+
+
+class BenchId(Base):
+
+    bar = Column(String(40), nullable=False)
+    num = Column(Integer, nullable=False)
+
+
+def table_size(engine) -> int:
+    """Return the size in bytes of the table and it's indexes.
+
+    """
+    with engine.connect() as conn:
+        if engine.dialect.name == 'postgresql':
+            return conn.execute(text(
+                "SELECT pg_total_relation_size('benchid')")).scalar()
+        if engine.dialect.name == 'sqlite':
+            return conn.execute(text('PRAGMA page_count')).scalar() * \
+                conn.execute(text('PRAGMA page_size')).scalar()
+    return 0
+
+
+def insert(rows, batch):
+    start = time.perf_counter()
+    for offset in range(0, rows, batch):
+        BenchId.save_many([{'bar': 'bar-{}'.format(i), 'num': i}
+                           for i in range(offset, min(offset + batch, rows))])
+    return time.perf_counter() - start
+
+
+def run(uri, strategies, rows, batch):
+    engine = create_engine(uri)
+    Session.configure(bind=engine)
+    try:
+        for strategy in strategies:
+            BenchId.id_strategy = strategy
+            Base.metadata.drop_all(bind=engine)
+            Base.metadata.create_all(bind=engine)
+            elapsed = insert(rows, batch)
+            Session.remove()
+            print('{:<7}{:>12,.0f} rows/sec  {:>10.1f} MiB'.format(
+                strategy, rows / elapsed, table_size(engine) / 1048576.0))
+        Base.metadata.drop_all(bind=engine)
+    finally:
+        Session.remove()
+        engine.dispose()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--uri', help='database uri, defaults to a SQLite '
+                                      'file in a temporary directory')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--batch', type=int, default=1000,
+                        help='rows inserted by each save_many call')
+    parser.add_argument('--strategies', default=','.join(STRATEGIES),
+                        help='comma separated id strategies')
+    args = parser.parse_args(argv)
+
+    strategies = [s for s in args.strategies.split(',') if s]
+    if args.uri is not None:
+        run(args.uri, strategies, args.rows, args.batch)
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = 'sqlite:///{}'.format(os.path.join(tmp, 'bench.db'))
+        run(uri, strategies, args.rows, args.batch)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
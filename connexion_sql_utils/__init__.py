@@ -1,7 +1,16 @@
 from .base_mixin_abc import BaseMixinABC
 from .sqlmixins import BaseMixin
 from .decorators import ensure_asset, to_json, event_func, dump_method
-from .crud import delete, get, get_id, put, post
+from .crud import delete, delete_by, get, get_id, put, post, post_many, \
+    put_many, async_delete, async_get, async_get_id, async_post, async_put
+from .aio import AsyncBaseMixin
+from .serializers import JSONSerializer, MsgPackSerializer
+from .middleware import SessionMiddleware
+from .cache import LRUCache, QueryCache
+from .engine import Database
+from .metrics import MemorySink
+from .debug import NPlusOneWarning, QueryCounter, assert_max_queries
+from .types import GUID
 
 __author__ = """Michael Housh"""
 __email__ = 'mhoush@houshhomeenergy.com'
@@ -16,8 +25,28 @@ __all__ = [
     'event_func',
     'dump_method',
     'delete',
+    'delete_by',
     'get_id',
     'get',
     'put',
-    'post'
+    'post',
+    'post_many',
+    'put_many',
+    'async_delete',
+    'async_get',
+    'async_get_id',
+    'async_post',
+    'async_put',
+    'AsyncBaseMixin',
+    'JSONSerializer',
+    'MsgPackSerializer',
+    'SessionMiddleware',
+    'LRUCache',
+    'QueryCache',
+    'Database',
+    'MemorySink',
+    'NPlusOneWarning',
+    'QueryCounter',
+    'assert_max_queries',
+    'GUID'
 ]
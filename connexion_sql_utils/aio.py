@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+"""
+aio.py
+~~~~~~
+
+This module holds the asyncio variant of :class:`BaseMixin`, built on the
+``sqlalchemy`` asyncio extension (``sqlalchemy>=1.4``) and an async driver,
+such as ``asyncpg`` or ``aiosqlite``.
+
+Example::
+
+    engine = create_async_engine('postgresql+asyncpg://...')
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+
+    class MyBase(AsyncBaseMixin):
+
+        @staticmethod
+        def session_maker():
+            return Session()
+
+    DbModel = declarative_base(cls=MyBase)
+
+The database methods are coroutines, that run the same statements as the
+:class:`BaseMixin` methods with ``AsyncSession.run_sync``.  The session
+maker should not expire instances on commit, as loading an expired
+attribute needs to be awaited.
+
+The pinned ``connexion`` (1.1.5) has no async app, so the ``crud.async_``
+handlers can not be used as an ``operationId`` yet, and their responses
+are only encoded inside of a ``flask`` request context.
+
+"""
+import asyncio
+import contextlib
+from typing import Any, Dict, List, Set, Tuple
+
+from .base_mixin_abc import BaseMixinABC
+from .metrics import phase
+from .sqlmixins import BaseMixin, _id_key, _sessions, logger
+
+
+class AsyncBaseMixin(BaseMixin):
+    """Base sqlalchemy mixin for an ``AsyncSession``.  Like
+    :class:`BaseMixin`, with coroutines for the methods that use a session.
+
+    The ``session_maker`` should return a
+    :class:`sqlalchemy.ext.asyncio.AsyncSession`.
+
+    """
+
+    @classmethod
+    def _query_all(cls, session, kwargs, limit, offset, after, fields):
+        return cls._query(session, kwargs, limit=limit, offset=offset,
+                          after=after, fields=fields).all()
+
+    @classmethod
+    async def query_by(cls, session=None, limit=None, offset=None, after=None,
+                       fields=None, **kwargs) -> List[Any]:
+        """Return a list of the instances matching the ``kwargs``.  The
+        arguments are the same as :meth:`BaseMixin.query_by`.
+
+        """
+        if session is not None:
+            return await session.run_sync(cls._query_all, kwargs, limit,
+                                          offset, after, fields)
+
+        async with cls._read_scope() as session:
+            return await session.run_sync(cls._query_all, kwargs, limit,
+                                          offset, after, fields)
+
+    @classmethod
+    def _first(cls, session, kwargs, fields):
+        return cls._query(session, kwargs, fields=fields).first()
+
+    @classmethod
+    async def get_id(cls, id, session=None, fields=None):
+        """Get by id, or ``None`` if the id does not exist.
+
+        :param id:  The unique identifier for the class.
+        :param session:  An optional ``AsyncSession``, if one is not passed
+                         a session will be created for the query.
+        :param fields:  An optional sequence of attribute names, only these
+                        columns (and the primary key) are loaded.
+
+        """
+        try:
+            if session is not None:
+                return await session.run_sync(cls._first, {'id': id}, fields)
+
+            async with cls._read_scope() as session:
+                return await session.run_sync(cls._first, {'id': id}, fields)
+        except asyncio.CancelledError:
+            # this is a subclass of ``Exception`` before python 3.8.
+            raise
+        except Exception:
+            return None
+
+    @classmethod
+    async def dump_id(cls, id, fields=None) -> Dict[str, Any]:
+        """Return the dict representation of an instance by id, or ``None``
+        if the id does not exist.  This reads through the ``id_cache``, like
+        :meth:`BaseMixin.dump_id`.
+
+        """
+        cache = cls.id_cache
+        if cache is None or cls._has_writes():
+            with phase('hydrate'):
+                instance = await cls.get_id(id, fields=fields)
+            if instance is None:
+                return None
+            return instance.dump(_dict=True, fields=fields)
+
+        vals = cache.get(_id_key(id))
+        if vals is None:
+            with phase('hydrate'):
+                instance = await cls.get_id(id)
+            if instance is None:
+                return None
+            vals = instance.dump(_dict=True)
+            # the callers get a copy, so that they can not change the cache.
+            cache.set(_id_key(id), dict(vals))
+
+        if fields is not None:
+            return {k: vals[k] for k in fields if k in vals}
+        return dict(vals)
+
+    @classmethod
+    async def dump_by(cls, limit=None, offset=None, fields=None,
+                      **kwargs) -> List[Dict[str, Any]]:
+        """Return the dict representations of the instances matching the
+        ``kwargs``.  This reads through the ``query_cache``, like
+        :meth:`BaseMixin.dump_by`.
+
+        """
+        key = cls._query_key(limit, offset, fields, kwargs)
+        if key is not None:
+            vals = cls.query_cache.get(key)
+            if vals is not None:
+                return [dict(v) for v in vals]
+
+        with phase('hydrate'):
+            instances = await cls.query_by(limit=limit, offset=offset,
+                                           fields=fields, **kwargs)
+        vals = cls.dump_many(instances, _dict=True, fields=fields)
+        if key is not None:
+            cls.query_cache.set(key, [dict(v) for v in vals])
+        return vals
+
+    @classmethod
+    async def versions_by(cls, session=None, limit=None, offset=None,
+                          **kwargs) -> List[Tuple[str, Any]]:
+        """Return the ``(id, version)`` of the rows matching the ``kwargs``,
+        see :meth:`BaseMixin.versions_by`.
+
+        """
+        if cls.version_column is None:
+            raise TypeError('{} does not declare a version_column'
+                            .format(cls.__name__))
+
+        if session is not None:
+            return await session.run_sync(cls._versions_by, limit, offset,
+                                          kwargs)
+
+        async with cls._read_scope() as session:
+            return await session.run_sync(cls._versions_by, limit, offset,
+                                          kwargs)
+
+    @classmethod
+    async def stream_by(cls, chunk_size=1000, limit=None, offset=None,
+                        fields=None, **kwargs):
+        """An async generator of the instances of the class matching the
+        ``kwargs``, fetched ``chunk_size`` rows at a time with
+        ``AsyncSession.stream_scalars``, see :meth:`BaseMixin.stream_by`.
+
+        Example::
+
+            async for foo in Foo.stream_by(bar='baz'):
+                ...
+
+        """
+        async with cls._read_scope() as session:
+            query = cls._query(session.sync_session, kwargs, limit=limit,
+                               offset=offset, fields=fields)
+            result = await session.stream_scalars(
+                query.statement, execution_options={'yield_per': chunk_size})
+            async for instance in result:
+                yield instance
+
+    async def update(self, session=None, **kwargs):
+        """Update attributes on an instance.
+
+        :param kwargs:  The attributes to update on the instance.  Any
+                        attribute not declared on the class is ignored.
+        :param session:  An optional ``AsyncSession``, if one is not passed
+                         a session will be created for the query.
+
+        """
+        if session is not None:
+            return await session.run_sync(self._update, kwargs)
+
+        async with self.session_scope() as session:
+            return await session.run_sync(self._update, kwargs)
+
+    @classmethod
+    async def update_id(cls, id, changes, session=None):
+        """Update a row by id without loading it, see
+        :meth:`BaseMixin.update_id`.
+
+        """
+        if session is not None:
+            return await session.run_sync(cls._update_id, id, changes)
+
+        async with cls.session_scope() as session:
+            return await session.run_sync(cls._update_id, id, changes)
+
+    @classmethod
+    async def update_many(cls, changes, session=None) -> Set[str]:
+        """Update many rows by id without loading them, see
+        :meth:`BaseMixin.update_many`.
+
+        """
+        if session is not None:
+            return await session.run_sync(cls._update_many, changes)
+
+        async with cls.session_scope() as session:
+            return await session.run_sync(cls._update_many, changes)
+
+    async def save(self, session=None):
+        """Save an instance to the database.
+
+        :param session:  An optional ``AsyncSession``, if one is not passed
+                         a session will be created for the query.
+
+        """
+        if session is not None:
+            return await session.run_sync(self._save)
+
+        async with self.session_scope() as session:
+            return await session.run_sync(self._save)
+
+    @classmethod
+    async def save_many(cls, items, session=None) -> List[str]:
+        """Insert many rows and return their new ids, see
+        :meth:`BaseMixin.save_many`.
+
+        """
+        if session is not None:
+            return await session.run_sync(cls._save_many, items)
+
+        async with cls.session_scope() as session:
+            return await session.run_sync(cls._save_many, items)
+
+    async def delete(self, session=None):
+        """Delete an instance from the database.
+
+        :param session:  An optional ``AsyncSession``, if one is not passed
+                         a session will be created for the query.
+
+        """
+        if session is not None:
+            return await session.run_sync(self._delete)
+
+        async with self.session_scope() as session:
+            return await session.run_sync(self._delete)
+
+    @classmethod
+    async def delete_id(cls, id, session=None) -> bool:
+        """Delete a row by id without loading it, see
+        :meth:`BaseMixin.delete_id`.
+
+        """
+        if session is not None:
+            return await session.run_sync(cls._delete_id, id)
+
+        async with cls.session_scope() as session:
+            return await session.run_sync(cls._delete_id, id)
+
+    @classmethod
+    async def delete_where(cls, session=None, **kwargs) -> int:
+        """Delete the rows matching the ``kwargs`` without loading them, see
+        :meth:`BaseMixin.delete_where`.
+
+        """
+        if not kwargs and cls.require_delete_filter is True:
+            raise ValueError('Refusing to delete all rows of {}'
+                             .format(cls.__name__))
+
+        if session is not None:
+            return await session.run_sync(cls._delete_where, kwargs)
+
+        async with cls.session_scope() as session:
+            return await session.run_sync(cls._delete_where, kwargs)
+
+    @classmethod
+    @contextlib.asynccontextmanager
+    async def _read_scope(cls):
+        """An async context manager for a session used to read, see
+        :meth:`BaseMixin._read_scope`.
+
+        """
+        if cls._use_replica():
+            session = cls.read_session_maker()
+            try:
+                yield session
+            finally:
+                await session.close()
+            return
+
+        session = cls.current_session()
+        if session is not None:
+            yield session
+            return
+
+        async with cls.session_scope() as session:
+            yield session
+
+    @classmethod
+    @contextlib.asynccontextmanager
+    async def _nested_scope(cls, session):
+        savepoint = await session.begin_nested()
+        try:
+            yield session
+            if savepoint.is_active:
+                await savepoint.commit()
+        except Exception as err:
+            # a failed flush leaves the savepoint inactive, but not closed.
+            if savepoint.sync_transaction.session is not None:
+                await savepoint.rollback()
+            logger.debug('error commiting savepoint: {}'.format(err))
+            raise
+
+    @classmethod
+    @contextlib.asynccontextmanager
+    async def session_scope(cls):
+        """An async context manager for an ``AsyncSession``, that commits on
+        success, rolls back on errors, and closes the session.  Scopes are
+        reentrant, like :meth:`BaseMixin.session_scope`.
+
+        """
+        if not issubclass(cls, BaseMixinABC):
+            raise TypeError('Must declare a session maker method.')
+
+        session = cls.current_session()
+        if session is not None:
+            async with cls._nested_scope(session) as session:
+                yield session
+            return
+
+        session = cls.session_maker()
+        sessions = dict(_sessions.get())
+        sessions[cls._session_key()] = session
+        token = _sessions.set(sessions)
+        try:
+            with cls._count_queries():
+                yield session
+                with phase('commit'):
+                    await session.commit()
+        except Exception as err:
+            await session.rollback()
+            logger.debug('error commiting: {}'.format(err))
+            raise
+        finally:
+            _sessions.reset(token)
+            await session.close()
@@ -71,23 +71,51 @@ class BaseMixinABC(metaclass=abc.ABCMeta):
 
     @classmethod
     @abc.abstractmethod
-    def query_by(cls, **kwargs):  # pragma: no cover
+    def query_by(cls, limit=None, offset=None, after=None, fields=None,
+                 **kwargs):  # pragma: no cover
         """Query the database model with the given criteria.
 
         This is used as you would use ``filter_by`` on an sqlalchemy query.
-        And should always return a list of items.
+        And should always return a list of items.  The ``limit`` and
+        ``offset`` should be applied by the database query.  When ``after``
+        is passed the items should be ordered by the ``keyset`` of the class
+        and start after the ``after`` values.  When ``fields`` is passed only
+        those attributes need to be loaded.
 
         """
         pass
 
     @classmethod
     @abc.abstractmethod
-    def get_id(cls, id):  # pragma: no cover
-        """Query the database for a single item by it's unique id.
+    def get_id(cls, id, fields=None):  # pragma: no cover
+        """Query the database for a single item by it's unique id.  When
+        ``fields`` is passed only those attributes need to be loaded.
 
         """
         pass
 
+    @classmethod
+    def dump_id(cls, id, fields=None):
+        """Return the dict representation of a single item by it's unique id,
+        or ``None`` if it does not exist.  Sub-classes may override this to
+        cache the representation.
+
+        """
+        instance = cls.get_id(id, fields=fields)
+        if instance is not None:
+            return instance.dump(_dict=True, fields=fields)
+
+    @classmethod
+    def dump_by(cls, limit=None, offset=None, fields=None, **kwargs):
+        """Return the dict representations of the items matching the
+        ``kwargs``, see :meth:`query_by`.  Sub-classes may override this to
+        cache the results.
+
+        """
+        return [instance.dump(_dict=True, fields=fields) for instance in
+                cls.query_by(limit=limit, offset=offset, fields=fields,
+                             **kwargs)]
+
     @abc.abstractmethod
     def save(self):  # pragma: no cover
         """Save an instance to the database.
@@ -110,9 +138,11 @@ class BaseMixinABC(metaclass=abc.ABCMeta):
         pass
 
     @abc.abstractmethod
-    def dump(self):  # pragma: no cover
+    def dump(self, _dict=None, fields=None):  # pragma: no cover
         """Return a json representation of the instance.  This is also used
-        as the str() representation of an instance.
+        as the str() representation of an instance.  When ``_dict`` is true
+        a dict is returned instead, and when ``fields`` is passed only those
+        keys are included.
 
         """
         pass
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+cache.py
+~~~~~~~~
+
+This module holds the in memory caches that can be attached to a database
+model.
+
+Example::
+
+    class Foo(DbModel):
+
+        id_cache = LRUCache(maxsize=1024, ttl=60)
+        query_cache = QueryCache(max_bytes=16 * 1024 * 1024)
+
+        bar = Column(String(40), nullable=False)
+
+The ``query_cache`` entries are keyed by the version of the table, which is
+bumped by every write, so a write invalidates all of the cached queries for
+the table at once.  The stale entries are left to be evicted.
+
+The caches are per process, and are invalidated by the writes that go
+through the :class:`BaseMixin` methods and the ``sqlalchemy`` events of the
+model.  Writes made any other way are only seen once the entries expire.
+
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+
+def _sizeof(obj) -> int:
+    """Estimate the memory used by ``obj``, including the items of ``dict``,
+    ``list`` and ``tuple`` values.
+
+    """
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_sizeof(k) + _sizeof(v) for (k, v) in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_sizeof(v) for v in obj)
+    return size
+
+
+class LRUCache(object):
+    """A thread safe, least recently used cache, with an optional time to
+    live for the entries.
+
+    :param maxsize:  The maximum number of entries, the least recently used
+                     entries are evicted past this size.
+    :param ttl:  An optional number of seconds an entry is valid for.
+    :param timer:  The clock used for the ``ttl``.
+
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, timer=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.currsize = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def weigh(self, value) -> int:
+        """Return the size of a value counted against the ``maxsize``.
+
+        """
+        return 1
+
+    def _remove(self, key) -> None:
+        (_, _, size) = self._data.pop(key)
+        self.currsize -= size
+
+    def get(self, key: Hashable, default=None) -> Any:
+        """Return the value for ``key``, or ``default`` if it is missing or
+        expired.
+
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                (expires, value, _) = entry
+                if expires is None or expires > self.timer():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Set the value for ``key``, evicting the least recently used entries
+        if the cache is full.  A value larger than the ``maxsize`` is not
+        stored.
+
+        """
+        size = self.weigh(value)
+        expires = self.timer() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            if size > self.maxsize:
+                return
+            self._data[key] = (expires, value, size)
+            self.currsize += size
+            while self.currsize > self.maxsize:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        """Remove the entry for ``key``, if there is one.
+
+        """
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self) -> None:
+        """Remove all of the entries.
+
+        """
+        with self._lock:
+            self._data.clear()
+            self.currsize = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit, miss, eviction and expiration counters and the
+        current size of the cache.
+
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'size': len(self._data),
+                'currsize': self.currsize,
+                'maxsize': self.maxsize,
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class QueryCache(LRUCache):
+    """A least recently used cache of query results, bounded by the
+    (estimated) memory used by the results instead of the number of entries.
+
+    :param max_bytes:  The memory budget for the cached results.
+    :param ttl:  An optional number of seconds an entry is valid for.
+    :param timer:  The clock used for the ``ttl``.
+
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, ttl=None,
+                 timer=time.monotonic):
+        super().__init__(maxsize=max_bytes, ttl=ttl, timer=timer)
+
+    def weigh(self, value) -> int:
+        return _sizeof(value)
+
+
+class TableVersions(object):
+    """Thread safe version counters by table name, used to key the
+    :class:`QueryCache` entries.
+
+    """
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> int:
+        """Return the current version for a table.
+
+        """
+        return self._versions.get(name, 0)
+
+    def bump(self, name: str) -> int:
+        """Increment and return the version for a table.
+
+        """
+        with self._lock:
+            version = self._versions[name] = self._versions.get(name, 0) + 1
+            return version
+
+
+table_versions = TableVersions()
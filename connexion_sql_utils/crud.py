@@ -24,12 +24,28 @@ pass ``isinstance`` or an ``issubclass`` check for the :class:`BaseMixinABC`.
 A class does not need to directly inherit from :class:`BaseMixinABC`, it just
 must declare all the methods of that interface.
 
+The ``async_`` functions are coroutines for an ``asset`` that derives from
+:class:`AsyncBaseMixin`.  The pinned ``connexion`` (1.1.5) has no async app,
+so they can not be used as an ``operationId`` yet, they are meant to be
+awaited from other asyncio code.  The responses are only encoded (with the
+content negotiation and the ``ETag``) inside of a ``flask`` request
+context, anywhere else the data is returned un-encoded, as it is outside of
+a request.
+
 """
+import asyncio
+import base64
+import hashlib
+import json
 import logging
-from typing import Iterable
+from typing import Iterable, Iterator, List, Sequence
 from connexion import NoContent
+from flask import Response, has_request_context, request
 
 from .decorators import ensure_asset
+from . import serializers
+from .metrics import instrument, phase
+from .sqlmixins import _id_key, _python_value
 
 
 def _del_nulls(kwargs):
@@ -54,31 +70,381 @@ def _parse_id(kwargs, _not=False) -> Iterable[str]:
             yield k
 
 
+def _fields(fields) -> Sequence[str]:
+    """Parse the ``fields`` to a tuple of names.  The ``fields`` can be a
+    comma separated string or a sequence of strings.
+
+    """
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    return tuple(f.strip() for f in fields if f.strip())
+
+
+def _limit(asset, limit):
+    """Return the ``limit`` to use for a query, defaulting to 100 and capped
+    at the ``max_limit`` of the ``asset`` if it declares one.
+
+    """
+    if limit is None:
+        limit = 100
+    max_limit = getattr(asset, 'max_limit', None)
+    if max_limit is not None:
+        limit = min(limit, max_limit)
+    return limit
+
+
+def _invalid_page(limit, offset) -> bool:
+    """Check if the ``limit`` or the ``offset`` is negative.
+
+    """
+    return any(v is not None and v < 0 for v in (limit, offset))
+
+
+def _stream_limit(asset, limit):
+    """Return the ``limit`` to use for a streamed query.  ``None`` (all of the
+    rows) is capped at the ``max_stream_limit`` of the ``asset``, or at it's
+    ``max_limit`` if it does not declare one.
+
+    """
+    max_limit = getattr(asset, 'max_stream_limit', None)
+    if max_limit is None:
+        max_limit = getattr(asset, 'max_limit', None)
+    if max_limit is None:
+        return limit
+    return max_limit if limit is None else min(limit, max_limit)
+
+
+def _serializer(asset):
+    """Return the serializer that best matches the ``Accept`` header of the
+    current request.  The ``serializer`` of the ``asset`` is used for json,
+    and when the header does not match any of the registered serializers.
+
+    """
+    default = getattr(asset, 'serializer', serializers.json_serializer)
+    available = {default.mimetype: default}
+    for serializer in serializers.registered():
+        available.setdefault(serializer.mimetype, serializer)
+
+    mimetype = request.accept_mimetypes.best_match(
+        list(available), default=default.mimetype)
+    return available[mimetype]
+
+
+def _etag(*parts) -> str:
+    """Return a strong entity tag, from the hash of the ``parts``.
+
+    """
+    digest = hashlib.sha1()
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = str(part).encode('utf-8')
+        digest.update(part)
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+def _not_modified(etag):
+    """Return a ``304 Not Modified`` response if the ``etag`` matches the
+    ``If-None-Match`` header of the current request, else ``None``.
+
+    """
+    if request.if_none_match.contains_weak(etag):
+        resp = Response(status=304)
+        resp.set_etag(etag)
+        return resp
+
+
+def _has_versions(asset) -> bool:
+    """Check if the entity tags of the ``asset`` are created from it's
+    ``version_column``, which is during a request if it declares one.
+
+    """
+    return has_request_context() and \
+        getattr(asset, 'version_column', None) is not None
+
+
+def _version_etag(asset, fields, versions) -> str:
+    """Return the entity tag of the ``(id, version)`` of the rows.
+
+    """
+    return _etag(_serializer(asset).mimetype, fields, versions)
+
+
+def _versioned_fields(asset, fields):
+    """Return the ``fields`` with the ``id`` and the ``version_column`` of
+    the ``asset`` added, so that the versions are dumped with the rows.
+
+    """
+    if fields is None:
+        return None
+    extra = ('id', asset.version_column)
+    return tuple(fields) + tuple(k for k in extra if k not in fields)
+
+
+def _loaded_versions(asset, fields, rows):
+    """Return the ``(id, version)`` of the dumped ``rows``, in the form of
+    :meth:`BaseMixin.versions_by`, and the rows with only the ``fields``.
+
+    """
+    column = getattr(asset, asset.version_column)
+    versions = [(row['id'], _python_value(column.type,
+                                          row[asset.version_column]))
+                for row in rows]
+    if fields is not None:
+        rows = [{k: row[k] for k in fields if k in row} for row in rows]
+    return versions, rows
+
+
+def _respond(asset, data, status=200, headers=None, etag=None):
+    """Encode ``data`` with the serializer negotiated for the current request.
+
+    Outside of a request context, ``data`` is returned un-encoded, along with
+    the ``status`` and ``headers`` if they are not the defaults.
+
+    :param etag:  An entity tag for the response, or ``True`` to tag the
+                  response with the hash of the encoded body.  A tagged
+                  response is ``304 Not Modified`` if the tag matches the
+                  ``If-None-Match`` header.
+
+    """
+    if not has_request_context():
+        if headers is not None:
+            return data, status, headers
+        return data if status == 200 else (data, status)
+
+    serializer = _serializer(asset)
+    with phase('dump'):
+        body = serializer.dumps(data)
+    if etag is True:
+        etag = _etag(serializer.mimetype, body)
+        not_modified = _not_modified(etag)
+        if not_modified is not None:
+            return not_modified
+
+    resp = Response(body, status=status, headers=headers,
+                    mimetype=serializer.mimetype)
+    if etag is not None:
+        resp.set_etag(etag)
+    return resp
+
+
+def _encode_cursor(values: Sequence) -> str:
+    """Encode the keyset values of a row as an opaque cursor.
+
+    """
+    data = json.dumps(list(values), default=str).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii')
+
+
+def _decode_cursor(cursor: str, size: int) -> Sequence:
+    """Decode a cursor created by :func:`_encode_cursor`.  An empty cursor
+    decodes to an empty sequence, which starts at the first page.
+
+    :raises ValueError:  If the cursor is not a valid cursor for a keyset of
+                         length ``size``.
+
+    """
+    if not cursor:
+        return ()
+    values = json.loads(
+        base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('Invalid cursor:{}'.format(cursor))
+    return values
+
+
+def _get_page(asset, limit, offset, cursor, fields, kwargs):
+    """Retrieve a keyset (cursor) page of assets, see :func:`get`.
+
+    """
+    keys = asset.keyset()
+    try:
+        after = _decode_cursor(cursor, len(keys))
+        if after:
+            after = asset.keyset_values(after)
+    except ValueError as err:
+        logging.debug('Invalid cursor:{}'.format(err))
+        return NoContent, 400
+
+    with asset._read_scope() as session:
+        # fetch one extra row to know if there is a next page.
+        with phase('hydrate'):
+            resp = asset.query_by(session=session, limit=limit + 1,
+                                  offset=offset, after=after, fields=fields,
+                                  **kwargs).all()
+        headers = {}
+        if limit > 0 and len(resp) > limit:
+            headers['X-Next-Cursor'] = _encode_cursor(
+                getattr(resp[limit - 1], k) for k in keys)
+        vals = asset.dump_many(resp[:limit], _dict=True, fields=fields)
+    return _respond(asset, vals, 200, headers, etag=True)
+
+
+def _json_serializer(asset):
+    """Return the ``serializer`` of the ``asset`` if it encodes json, else
+    the default json serializer.
+
+    """
+    serializer = getattr(asset, 'serializer', serializers.json_serializer)
+    if serializer.mimetype == serializers.json_serializer.mimetype:
+        return serializer
+    return serializers.json_serializer
+
+
+def _dump_chunks(rows, size, fields, serializer) -> Iterator[List[str]]:
+    """Dump the ``rows`` in lists of at most ``size`` json strings, encoded
+    with the json ``serializer``.
+
+    """
+    chunk = []
+    for row in rows:
+        chunk.append(serializer.dumps(row.dump(_dict=True, fields=fields)))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _ndjson(chunks) -> Iterator[str]:
+    """Render chunks of json strings as newline delimited json.
+
+    """
+    for chunk in chunks:
+        yield '\n'.join(chunk) + '\n'
+
+
+def _json_array(chunks) -> Iterator[str]:
+    """Render chunks of json strings as a json array.
+
+    """
+    sep = '['
+    for chunk in chunks:
+        yield sep + ','.join(chunk)
+        sep = ','
+    yield ']' if sep == ',' else '[]'
+
+
+_STREAM_FORMATS = {
+    'ndjson': ('application/x-ndjson', _ndjson),
+    'json': ('application/json', _json_array),
+}
+
+
+def _stream(asset, stream, limit, offset, fields, kwargs):
+    """Stream the assets as a chunked response, see :func:`get`.
+
+    """
+    if stream not in _STREAM_FORMATS:
+        logging.debug('Invalid stream format:{}'.format(stream))
+        return NoContent, 400
+
+    mimetype, render = _STREAM_FORMATS[stream]
+    chunk_size = 1000
+    rows = asset.stream_by(chunk_size=chunk_size, limit=limit, offset=offset,
+                           fields=fields, **kwargs)
+    chunks = _dump_chunks(rows, chunk_size, fields, _json_serializer(asset))
+    return Response(render(chunks), mimetype=mimetype)
+
+
 @ensure_asset
-def get(asset, limit=1, **kwargs):
+@instrument
+def get(asset, limit=1, offset=None, cursor=None, stream=None, fields=None,
+        **kwargs):
     """Retrieves assets from the database.  Assets are always returned as a
-    list(array) of size ``limit``.
+    list(array) of at most size ``limit``.
+
+    During a request the assets are encoded once, as json or as any other
+    registered serializer that is asked for in the ``Accept`` header (for
+    example MessagePack).  Outside of a request a list of dicts is returned.
+
+    The ``limit`` and ``offset`` are applied in the database query, so only
+    the rows that are returned are ever loaded.
+
+    If the ``asset`` has a ``query_cache`` the results are cached until the
+    next write to the table, see :meth:`BaseMixin.dump_by`.
+
+    During a request the response has a strong ``ETag``, and is ``304 Not
+    Modified`` when the tag matches the ``If-None-Match`` header.  If the
+    ``asset`` declares a ``version_column`` the tag is created from the
+    versions of the rows, which are checked before any rows are loaded when
+    the request has an ``If-None-Match`` header, otherwise the tag is the
+    hash of the encoded response.
 
     :param asset:  The database class to query. This must inherit from
                    :class:`Base`
-    :param limit: The limit for the return values
+    :param limit: The limit for the return values.  This is capped at the
+                  ``max_limit`` of the ``asset``.
+    :param offset: The number of rows to skip before returning values.
+                   A negative ``limit`` or ``offset`` returns a ``400``.
+    :param cursor: An opaque cursor to page through the assets with keyset
+                   pagination.  Pass an empty string for the first page.
+                   The response then includes an ``X-Next-Cursor`` header
+                   with the cursor for the next page, which is missing on
+                   the last page.
+    :param stream: Either ``'ndjson'`` or ``'json'``, to stream the assets
+                   as a chunked newline delimited json or json array
+                   response, without holding all of the rows in memory.
+                   Streams are always json, whatever the ``Accept`` header
+                   or the ``serializer`` of the ``asset``.
+                   When streaming a ``limit`` of ``None`` returns all of the
+                   assets, capped at the ``max_stream_limit`` of the
+                   ``asset``, or it's ``max_limit`` if it does not declare
+                   one.
+    :param fields: An optional comma separated string or a sequence of the
+                   keys to return for each asset.  Only the matching columns
+                   are loaded from the database.
     :param kwargs: Are query parameters to filter the assets by
 
     :raises TypeError: if the ``asset`` does not inherit from :class:`Base`
 
     """
-    if limit is None:
-        limit = 100
     kwargs = _del_nulls(kwargs)
-    resp = asset.query_by(**kwargs)
-    return [r.dump() for r in resp][:limit]
+    fields = _fields(fields)
+    if _invalid_page(limit, offset):
+        logging.debug('Invalid limit or offset:{}:{}'.format(limit, offset))
+        return NoContent, 400
+
+    if stream is not None:
+        return _stream(asset, stream, _stream_limit(asset, limit), offset,
+                       fields, kwargs)
+
+    limit = _limit(asset, limit)
+    if cursor is not None:
+        return _get_page(asset, limit, offset, cursor, fields, kwargs)
+
+    etag = True
+    if _has_versions(asset) and not request.if_none_match:
+        vals = asset.dump_by(limit=limit, offset=offset,
+                             fields=_versioned_fields(asset, fields),
+                             **kwargs)
+        (versions, vals) = _loaded_versions(asset, fields, vals)
+        return _respond(asset, vals,
+                        etag=_version_etag(asset, fields, versions))
+
+    if _has_versions(asset):
+        # the versions are checked before any rows are loaded.
+        etag = _version_etag(asset, fields, asset.versions_by(
+            limit=limit, offset=offset, **kwargs))
+        not_modified = _not_modified(etag)
+        if not_modified is not None:
+            return not_modified
+
+    return _respond(asset, asset.dump_by(limit=limit, offset=offset,
+                                         fields=fields, **kwargs), etag=etag)
 
 
 @ensure_asset
-def get_id(asset, **kwargs):
+@instrument
+def get_id(asset, fields=None, **kwargs):
     """Get an asset by the unique id.
 
-    The key for the id must have 'id' in the name in the kwargs.
+    The key for the id must have 'id' in the name in the kwargs.  The asset
+    is encoded, and tagged with an ``ETag``, as described in :func:`get`.
+    Only the keys in ``fields`` are returned if it is passed, see
+    :func:`get`.
 
     Example::
 
@@ -89,13 +455,39 @@ def get_id(asset, **kwargs):
     id_key = next(_parse_id(kwargs), None)
     if id_key is None:
         raise TypeError('Could not parse id key:{}'.format(kwargs))
-    instance = asset.get_id(kwargs[id_key])
-    if instance is not None:
-        return instance.dump()
+    fields = _fields(fields)
+    id = kwargs[id_key]
+    etag = True
+    if _has_versions(asset) and not request.if_none_match:
+        vals = asset.dump_id(id, fields=_versioned_fields(asset, fields))
+        if vals is None:
+            return NoContent, 404
+        (versions, (vals,)) = _loaded_versions(asset, fields, [vals])
+        return _respond(asset, vals,
+                        etag=_version_etag(asset, fields, versions))
+
+    if _has_versions(asset):
+        # the version is checked before the row is loaded.
+        try:
+            versions = asset.versions_by(id=id)
+        except Exception as err:
+            logging.debug('Exception:get_id:{}'.format(err))
+            return NoContent, 404
+        if not versions:
+            return NoContent, 404
+        etag = _version_etag(asset, fields, versions)
+        not_modified = _not_modified(etag)
+        if not_modified is not None:
+            return not_modified
+
+    vals = asset.dump_id(id, fields=fields)
+    if vals is not None:
+        return _respond(asset, vals, etag=etag)
     return NoContent, 404
 
 
 @ensure_asset
+@instrument
 def post(asset, **kwargs):
     """Post an asset to the database.
 
@@ -119,19 +511,108 @@ def post(asset, **kwargs):
     try:
         instance.save()
         logging.debug('Created:{}:{}'.format(asset.__name__, repr(instance)))
-        return instance.dump(), 201
+        return _respond(asset, instance.dump(_dict=True), 201)
     except Exception as err:
         logging.debug('Exception:post_id:{}'.format(err))
     return NoContent, 400
 
 
+def _validate_item(item, column_keys):
+    """Return an error message if ``item`` is not a valid dict of attributes
+    for the ``asset``, else ``None``.
+
+    """
+    if not isinstance(item, dict):
+        return 'Expected an object:{}'.format(item)
+    unknown = sorted(k for k in item if k not in column_keys)
+    if unknown:
+        return 'Unknown keys:{}'.format(', '.join(unknown))
+    return None
+
+
+@ensure_asset
+@instrument
+def post_many(asset, **kwargs):
+    """Post many assets to the database in a single transaction, using bulk
+    inserts.  Returns the ids of the created assets and the items that failed
+    validation by their index, as::
+
+        {'ids': [...], 'errors': [{'index': 1, 'error': '...'}]}
+
+    The valid items are still created when some items fail validation.  The
+    ``before_insert`` event listeners of the ``asset`` are not called, the
+    ids are created with ``asset.new_id``.
+
+    :param asset:  The database class to query. This must inherit from
+                   :class:`Base`
+    :param kwargs:  This should be of length 1, the key only matters to
+                    ``connexion``, the value for the key should be a list
+                    of the kwargs for each asset.
+
+    :raises TypeError: if the ``asset`` does not inherit from :class:`Base`
+
+    """
+    if not len(kwargs) > 0:
+        raise TypeError('Not enough context, kwargs should be of length 1:{}'
+                        .format(kwargs))
+
+    items = next(iter(kwargs.values())) or []
+    column_keys = set(asset.column_keys())
+    valid, errors = [], []
+    for (index, item) in enumerate(items):
+        error = _validate_item(item, column_keys)
+        if error is None:
+            valid.append(item)
+        else:
+            errors.append({'index': index, 'error': error})
+
+    if errors and not valid:
+        return _respond(asset, {'ids': [], 'errors': errors}, 400)
+
+    try:
+        ids = asset.save_many(valid) if valid else []
+        logging.debug('Created:{}:{}'.format(asset.__name__, len(ids)))
+    except Exception as err:
+        logging.debug('Exception:post_many:{}'.format(err))
+        return NoContent, 400
+    return _respond(asset, {'ids': ids, 'errors': errors}, 201)
+
+
+def _put_returning(asset, id, data):
+    """Update an asset with a single statement, see :func:`put`.
+
+    """
+    try:
+        id = _python_value(asset.id.type, id)
+    except ValueError as err:
+        logging.debug('Invalid id:put:{}:{}'.format(asset.__name__, err))
+        return NoContent, 404
+
+    try:
+        instance = asset.update_id(id, dict(data))
+    except Exception as err:
+        logging.debug('Failed:put:{}:{}'.format(asset.__name__, err))
+        return NoContent, 400
+
+    if instance is None:
+        return NoContent, 404
+    logging.debug('Updated:{}:{}'.format(asset.__name__, repr(instance)))
+    return _respond(asset, instance.dump(_dict=True))
+
+
 @ensure_asset
+@instrument
 def put(asset, **kwargs):
     """Update an asset.  The kwargs should be of length 2, one of which is an
     id key (has 'id' in it's name), used to look up the item in the database.
     The other key should not have 'id' in it's name, and used as the data to
     update the asset.
 
+    The asset is updated with a single ``UPDATE ... RETURNING`` statement
+    that only writes the changed columns, see ``BaseMixin.update_id``.  If
+    the ``asset`` sets ``orm_events`` the instance is loaded and updated
+    through the ORM instead, so that it's event listeners are called.
+
     :param asset:  The database asset.
 
     :raises TypeError:  If could not find a key with 'id' in it's name or could
@@ -147,13 +628,16 @@ def put(asset, **kwargs):
     if data_key is None:
         raise TypeError('unable to parse data')
 
+    if getattr(asset, 'orm_events', True) is not True:
+        return _put_returning(asset, kwargs[id_key], kwargs[data_key])
+
     instance = asset.get_id(kwargs[id_key])
     if instance is not None:
         try:
             instance.update(**dict(kwargs[data_key]))
             logging.debug('Updated:{}:{}'
                           .format(asset.__name__, repr(instance)))
-            return instance.dump()
+            return _respond(asset, instance.dump(_dict=True))
         except Exception as err:
             logging.debug('Failed:post:{}:{}'.format(asset.__name__, err))
             return NoContent, 400
@@ -161,15 +645,112 @@ def put(asset, **kwargs):
     return NoContent, 404
 
 
+def _validate_change(change, column_keys, id_type):
+    """Return an error message if ``change`` is not a valid ``{id, changes}``
+    object for :func:`put_many`, else ``None``.
+
+    """
+    if not isinstance(change, dict) or 'id' not in change:
+        return 'Expected an object with an id:{}'.format(change)
+    try:
+        _python_value(id_type, change['id'])
+    except ValueError:
+        return 'Invalid id:{}'.format(change['id'])
+    vals = change.get('changes')
+    if not isinstance(vals, dict) or not vals:
+        return 'Expected an object of changes:{}'.format(vals)
+    unknown = sorted(k for k in vals if k not in column_keys)
+    if unknown:
+        return 'Unknown keys:{}'.format(', '.join(unknown))
+    return None
+
+
 @ensure_asset
+@instrument
+def put_many(asset, **kwargs):
+    """Update many assets by id in a single transaction, without loading
+    them.  The value of the kwargs should be a list of objects like::
+
+        {'id': '...', 'changes': {'bar': 'baz'}}
+
+    Changes with a value of ``None`` are ignored, like :func:`put`.  The
+    status of each object is returned in the same order, as::
+
+        [{'id': '...', 'status': 200}, ...]
+
+    The status is ``404`` if the id is not found, and ``400`` (with an
+    ``error``) if the object or it's id is invalid.  Event listeners of the
+    ``asset`` are not called.
+
+    :param asset:  The database class to query. This must inherit from
+                   :class:`Base`
+    :param kwargs:  This should be of length 1, the key only matters to
+                    ``connexion``.
+
+    :raises TypeError: if the ``asset`` does not inherit from :class:`Base`
+
+    """
+    if not len(kwargs) > 0:
+        raise TypeError('Not enough context, kwargs should be of length 1:{}'
+                        .format(kwargs))
+
+    items = next(iter(kwargs.values())) or []
+    column_keys = set(asset.column_keys()) - set(('id',))
+    id_type = asset.id.type
+    statuses, changes = [], {}
+    for item in items:
+        error = _validate_change(item, column_keys, id_type)
+        if error is not None:
+            id = item.get('id') if isinstance(item, dict) else None
+            statuses.append({'id': id, 'status': 400, 'error': error})
+        else:
+            statuses.append({'id': item['id'], 'status': None})
+            vals = _del_nulls(dict(item['changes']))
+            changes.setdefault(item['id'], {}).update(vals)
+
+    try:
+        found = asset.update_many(changes) if changes else set()
+        logging.debug('Updated:{}:{}'.format(asset.__name__, len(found)))
+    except Exception as err:
+        logging.debug('Exception:put_many:{}'.format(err))
+        return NoContent, 400
+
+    # the ids are compared in their canonical form, as they can be passed
+    # as a ``UUID`` or any of it's string forms.
+    found = set(_id_key(id) for id in found)
+    for status in statuses:
+        if status['status'] is None:
+            status['status'] = 200 if _id_key(status['id']) in found else 404
+    return _respond(asset, statuses)
+
+
+@ensure_asset
+@instrument
 def delete(asset, **kwargs):
     """Delete an asset
 
+    The asset is deleted with a single ``DELETE ... RETURNING`` statement,
+    see ``BaseMixin.delete_id``.  If the ``asset`` sets ``orm_events`` the
+    instance is loaded and deleted through the ORM instead, so that it's
+    event listeners are called.
+
     """
     id_key = next(_parse_id(kwargs), None)
     if id_key is None:
         raise TypeError(id_key)
 
+    if getattr(asset, 'orm_events', True) is not True:
+        try:
+            deleted = asset.delete_id(kwargs[id_key])
+        except Exception as err:
+            logging.debug('Failed:delete:{}:{}'.format(asset.__name__, err))
+            deleted = False
+        if deleted is True:
+            logging.debug('Deleted asset:{}:{}'
+                          .format(asset.__name__, kwargs[id_key]))
+            return NoContent, 204
+        return NoContent, 404
+
     instance = asset.get_id(kwargs[id_key])
     if instance is not None:
         instance.delete()
@@ -177,3 +758,165 @@ def delete(asset, **kwargs):
                       .format(asset.__name__, repr(instance)))
         return NoContent, 204
     return NoContent, 404
+
+
+@ensure_asset
+@instrument
+def delete_by(asset, **kwargs):
+    """Delete the assets matching the ``kwargs`` with a single statement,
+    without loading them.  Returns the number of assets deleted, as::
+
+        {'deleted': 3}
+
+    Keys that are ``None`` or ``'null'`` are ignored, so if none of the
+    filters are passed every asset is deleted, unless the ``asset`` sets
+    ``require_delete_filter``, in which case a ``400`` is returned.
+
+    :param asset:  The database class to query. This must inherit from
+                   :class:`Base`
+    :param kwargs: Are query parameters to filter the assets by
+
+    :raises TypeError: if the ``asset`` does not inherit from :class:`Base`
+
+    """
+    kwargs = _del_nulls(kwargs)
+    try:
+        count = asset.delete_where(**kwargs)
+        logging.debug('Deleted:{}:{}'.format(asset.__name__, count))
+    except Exception as err:
+        logging.debug('Exception:delete_by:{}'.format(err))
+        return NoContent, 400
+    return _respond(asset, {'deleted': count})
+
+
+@ensure_asset
+@instrument
+async def async_get(asset, limit=1, offset=None, fields=None, **kwargs):
+    """Retrieves assets from the database, for an ``asset`` that derives
+    from :class:`AsyncBaseMixin`.  This is the same as :func:`get`, without
+    the ``cursor`` and ``stream`` options, and the response is tagged with
+    the hash of the encoded body.
+
+    """
+    kwargs = _del_nulls(kwargs)
+    fields = _fields(fields)
+    if _invalid_page(limit, offset):
+        logging.debug('Invalid limit or offset:{}:{}'.format(limit, offset))
+        return NoContent, 400
+
+    limit = _limit(asset, limit)
+    vals = await asset.dump_by(limit=limit, offset=offset, fields=fields,
+                               **kwargs)
+    return _respond(asset, vals, etag=True)
+
+
+@ensure_asset
+@instrument
+async def async_get_id(asset, fields=None, **kwargs):
+    """Get an asset by the unique id, for an ``asset`` that derives from
+    :class:`AsyncBaseMixin`, see :func:`get_id`.
+
+    """
+    id_key = next(_parse_id(kwargs), None)
+    if id_key is None:
+        raise TypeError('Could not parse id key:{}'.format(kwargs))
+    fields = _fields(fields)
+    vals = await asset.dump_id(kwargs[id_key], fields=fields)
+    if vals is not None:
+        return _respond(asset, vals, etag=True)
+    return NoContent, 404
+
+
+@ensure_asset
+@instrument
+async def async_post(asset, **kwargs):
+    """Post an asset to the database, for an ``asset`` that derives from
+    :class:`AsyncBaseMixin`, see :func:`post`.
+
+    """
+    if not len(kwargs) > 0:
+        raise TypeError('Not enough context, kwargs should be of length 1:{}'
+                        .format(kwargs))
+
+    vals = next(iter(kwargs.values()))
+    instance = asset(**vals)
+    try:
+        await instance.save()
+        logging.debug('Created:{}:{}'.format(asset.__name__, repr(instance)))
+        return _respond(asset, instance.dump(_dict=True), 201)
+    except Exception as err:
+        logging.debug('Exception:async_post:{}'.format(err))
+    return NoContent, 400
+
+
+@ensure_asset
+@instrument
+async def async_put(asset, **kwargs):
+    """Update an asset, for an ``asset`` that derives from
+    :class:`AsyncBaseMixin`, see :func:`put`.
+
+    """
+    id_key = next(_parse_id(kwargs), None)
+    if id_key is None:
+        raise TypeError('unable to parse id key')
+
+    data_key = next(_parse_id(kwargs, _not=True), None)
+    if data_key is None:
+        raise TypeError('unable to parse data')
+
+    try:
+        id = _python_value(asset.id.type, kwargs[id_key])
+    except ValueError as err:
+        logging.debug('Invalid id:async_put:{}:{}'
+                      .format(asset.__name__, err))
+        return NoContent, 404
+
+    try:
+        if getattr(asset, 'orm_events', True) is not True:
+            instance = await asset.update_id(id, dict(kwargs[data_key]))
+        else:
+            instance = await asset.get_id(id)
+            if instance is not None:
+                await instance.update(**dict(kwargs[data_key]))
+    except asyncio.CancelledError:
+        raise
+    except Exception as err:
+        logging.debug('Failed:async_put:{}:{}'.format(asset.__name__, err))
+        return NoContent, 400
+
+    if instance is None:
+        return NoContent, 404
+    logging.debug('Updated:{}:{}'.format(asset.__name__, repr(instance)))
+    return _respond(asset, instance.dump(_dict=True))
+
+
+@ensure_asset
+@instrument
+async def async_delete(asset, **kwargs):
+    """Delete an asset, for an ``asset`` that derives from
+    :class:`AsyncBaseMixin`, see :func:`delete`.
+
+    """
+    id_key = next(_parse_id(kwargs), None)
+    if id_key is None:
+        raise TypeError(id_key)
+
+    try:
+        if getattr(asset, 'orm_events', True) is not True:
+            deleted = await asset.delete_id(kwargs[id_key])
+        else:
+            instance = await asset.get_id(kwargs[id_key])
+            deleted = instance is not None
+            if deleted is True:
+                await instance.delete()
+    except asyncio.CancelledError:
+        raise
+    except Exception as err:
+        logging.debug('Failed:async_delete:{}:{}'.format(asset.__name__, err))
+        deleted = False
+
+    if deleted is True:
+        logging.debug('Deleted asset:{}:{}'
+                      .format(asset.__name__, kwargs[id_key]))
+        return NoContent, 204
+    return NoContent, 404
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+debug.py
+~~~~~~~~
+
+This module holds helpers to count the ``SQL`` statements that are run, and
+to find ``N+1`` query patterns, such as a lazy loaded relationship that is
+read for each row while dumping.
+
+Setting ``debug_queries`` on a model counts the statements of each of it's
+(outer) ``session_scope``'s, and warns with an :class:`NPlusOneWarning`
+when a statement of the same shape runs ``n_plus_one_threshold`` times or
+more in one scope.
+
+In tests :func:`assert_max_queries` locks in the number of statements a
+``crud`` function can run::
+
+    def test_get_foo():
+        with assert_max_queries(1):
+            crud.get(Foo, limit=10)
+
+"""
+import collections
+import contextlib
+import contextvars
+import re
+import threading
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# The query counters active in the current context.
+_counters = contextvars.ContextVar('connexion_sql_utils_query_counters',
+                                   default=())
+
+_listening = 0
+_lock = threading.Lock()
+
+_LITERALS = re.compile(
+    r"'(?:[^']|'')*'"                      # strings
+    r"|%\(\w+\)s|%s|\?|:\w+|\$\d+"         # bound parameters
+    r"|\b\d+(?:\.\d+)?\b"                  # numbers
+    r"|\(\[POSTCOMPILE_\w+\]\)|\[POSTCOMPILE_\w+\]")
+_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACES = re.compile(r'\s+')
+
+
+class NPlusOneWarning(UserWarning):
+    """Warns that a statement of the same shape ran many times in one
+    ``session_scope``.
+
+    """
+
+
+def statement_shape(statement: str) -> str:
+    """Return the shape of a statement, with the literals and parameters
+    replaced by ``?``, so that statements that only differ by their values
+    have the same shape.
+
+    """
+    shape = _LITERALS.sub('?', statement)
+    shape = _LISTS.sub('(?)', shape)
+    return _SPACES.sub(' ', shape).strip()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    for counter in _counters.get():
+        counter.statements.append(statement)
+
+
+def _listen() -> None:
+    global _listening
+    with _lock:
+        if _listening == 0:
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _listening += 1
+
+
+def _unlisten() -> None:
+    global _listening
+    with _lock:
+        _listening -= 1
+        if _listening == 0:
+            event.remove(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+class QueryCounter(object):
+    """A context manager that records the ``SQL`` statements run in the
+    current context (thread or task) while it is open.  Counters can be
+    nested.
+
+    Example::
+
+        with QueryCounter() as counter:
+            crud.get(Foo, limit=10)
+
+        print(counter.count, counter.repeated())
+
+    """
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self) -> int:
+        """The number of statements run.
+
+        """
+        return len(self.statements)
+
+    def shapes(self) -> Dict[str, int]:
+        """Return the number of statements of each shape, see
+        :func:`statement_shape`.
+
+        """
+        return collections.Counter(statement_shape(s)
+                                   for s in self.statements)
+
+    def repeated(self, threshold=2) -> Dict[str, int]:
+        """Return the shapes that ran at least ``threshold`` times, these are
+        likely ``N+1`` patterns.
+
+        """
+        return {shape: count for (shape, count) in self.shapes().items()
+                if count >= threshold}
+
+    def __enter__(self):
+        _listen()
+        self._token = _counters.set(_counters.get() + (self,))
+        return self
+
+    def __exit__(self, *args):
+        _counters.reset(self._token)
+        _unlisten()
+        return False
+
+
+def _report(counter) -> str:
+    return '\n'.join('  {}'.format(s) for s in counter.statements)
+
+
+@contextlib.contextmanager
+def assert_max_queries(n, n_plus_one=None):
+    """A context manager for tests, that fails if more than ``n`` statements
+    are run inside of it.
+
+    :param n:  The maximum number of statements.
+    :param n_plus_one:  If passed, also fail if a statement of the same
+                        shape runs this many times or more.
+
+    :raises AssertionError:  If the budget is exceeded.
+
+    """
+    with QueryCounter() as counter:
+        yield counter
+
+    if counter.count > n:
+        raise AssertionError('{} statements ran, expected at most {}:\n{}'
+                             .format(counter.count, n, _report(counter)))
+    if n_plus_one is not None:
+        repeated = counter.repeated(n_plus_one)
+        if repeated:
+            raise AssertionError(
+                'Statements ran {} or more times:\n{}'.format(
+                    n_plus_one, '\n'.join('  {} x {}'.format(c, s)
+                                          for (s, c) in repeated.items())))
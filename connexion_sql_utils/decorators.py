@@ -7,6 +7,7 @@ This module holds decorators either used by this package or for use
 when creating ``sqlalchemy`` database models.
 
 """
+import inspect
 from functools import wraps
 
 from .base_mixin_abc import BaseMixinABC
@@ -47,6 +48,12 @@ def to_json(*keys):
     ``Decimal`` from the database, which is not json serializable, so you must
     convert it to a string, a float, or an int, before calling ``json.dumps``.
 
+    .. note::
+
+        ``Decimal``, ``UUID`` and ``datetime`` values are handled by the
+        serializers in the ``serializers`` module, so they only need a
+        ``to_json`` method to change how they are converted.
+
 
     :param keys:  The keys/attributes to call the method on when converting.
 
@@ -65,14 +72,24 @@ def to_json(*keys):
 def ensure_asset(fn):
     """Ensure's that an asset passes an ``isinstance`` or an ``issubclass``
     check for :class:`BaseMixinABC` before calling a function. The asset must
-    be the first arg to the function.
+    be the first arg to the function.  ``async`` functions stay ``async``.
 
     """
-    @wraps(fn)
-    def decorator(asset, *args, **kwargs):
+    def check(asset):
         if not any((isinstance(asset, BaseMixinABC),
                     issubclass(asset, BaseMixinABC))):
             raise TypeError(asset)
+
+    if inspect.iscoroutinefunction(fn):
+        @wraps(fn)
+        async def async_decorator(asset, *args, **kwargs):
+            check(asset)
+            return await fn(asset, *args, **kwargs)
+        return async_decorator
+
+    @wraps(fn)
+    def decorator(asset, *args, **kwargs):
+        check(asset)
         return fn(asset, *args, **kwargs)
     return decorator
 
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+engine.py
+~~~~~~~~~
+
+This module holds a helper that creates the ``sqlalchemy`` engine, the
+session factory and the declarative base for the database models, from one
+set of options.
+
+Example::
+
+    db = Database('postgresql+psycopg2://...', pool_size=10, max_overflow=5)
+
+    class Foo(db.Base):
+
+        bar = Column(String(40), nullable=False)
+
+    if __name__ == '__main__':
+        db.Base.metadata.create_all(bind=db.engine)
+        db.warm()
+        app.run()
+
+"""
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import create_engine, exc
+from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from .sqlmixins import BaseMixin
+
+
+class StatsQueuePool(QueuePool):
+    """A :class:`sqlalchemy.pool.QueuePool` that records the time spent
+    waiting for a connection, the number of checkouts and timeouts, and the
+    peak overflow.
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.peak_overflow = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.timeouts += timed_out
+                self.wait_time += elapsed
+                self.max_wait_time = max(self.max_wait_time, elapsed)
+                self.peak_overflow = max(self.peak_overflow,
+                                         max(self.overflow(), 0))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the live state and the counters of the pool.
+
+        """
+        with self._stats_lock:
+            return {
+                'size': self.size(),
+                'checked_in': self.checkedin(),
+                'checked_out': self.checkedout(),
+                'overflow': max(self.overflow(), 0),
+                'peak_overflow': self.peak_overflow,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_time': self.wait_time,
+                'max_wait_time': self.max_wait_time,
+            }
+
+
+def _pool_stats(pool) -> Dict[str, Any]:
+    if isinstance(pool, StatsQueuePool):
+        return pool.stats()
+    return {'status': pool.status()}
+
+
+class Database(object):
+    """Creates the engine (with a :class:`StatsQueuePool`), a
+    ``scoped_session`` factory, and a declarative ``Base`` for the models
+    whose ``session_maker`` uses that factory.
+
+    :param uri:  The database uri for the engine.
+    :param mixin:  The mixin for the declarative ``Base``, defaults to
+                   :class:`BaseMixin`.
+    :param read_uri:  An optional uri of a read replica, used for the
+                      ``read_session_maker`` of the models.
+    :param pool_size:  The number of connections kept open in the pool.
+    :param max_overflow:  The number of connections allowed past the
+                          ``pool_size``, that are closed when returned.
+    :param pool_timeout:  The number of seconds to wait for a connection
+                          before raising an error.
+    :param pool_recycle:  Replace connections older than this many seconds,
+                          ``-1`` never replaces them.
+    :param pool_pre_ping:  Test connections when they are checked out.
+    :param engine_options:  Any other keyword arguments for
+                            ``create_engine``.
+    :param session_options:  Keyword arguments for the ``sessionmaker``, the
+                             defaults are ``autoflush=False`` and
+                             ``expire_on_commit=False``.
+
+    """
+
+    def __init__(self, uri, mixin=BaseMixin, read_uri=None, pool_size=5,
+                 max_overflow=10, pool_timeout=30, pool_recycle=-1,
+                 pool_pre_ping=False, engine_options=None,
+                 session_options=None):
+        options = dict(poolclass=StatsQueuePool, pool_size=pool_size,
+                       max_overflow=max_overflow, pool_timeout=pool_timeout,
+                       pool_recycle=pool_recycle,
+                       pool_pre_ping=pool_pre_ping)
+        options.update(engine_options or {})
+        session_options = dict(dict(autoflush=False, expire_on_commit=False),
+                               **(session_options or {}))
+
+        self.engine = create_engine(uri, **options)
+        self.Session = scoped_session(
+            sessionmaker(bind=self.engine, **session_options))
+
+        self.read_engine = None
+        self.ReadSession = None
+        if read_uri is not None:
+            self.read_engine = create_engine(read_uri, **options)
+            self.ReadSession = scoped_session(
+                sessionmaker(bind=self.read_engine, **session_options))
+
+        self.Base = declarative_base(cls=self._mixin(mixin))
+
+    def _mixin(self, mixin):
+        """Return a sub-class of the ``mixin`` with the ``session_maker`` and
+        ``read_session_maker`` of the database.
+
+        """
+        Session, ReadSession = self.Session, self.ReadSession
+        attrs = {'session_maker': staticmethod(lambda: Session())}
+        if ReadSession is not None:
+            attrs['read_session_maker'] = staticmethod(lambda: ReadSession())
+        return type(mixin.__name__, (mixin,), attrs)
+
+    def warm(self, n=None) -> int:
+        """Open ``n`` connections at once (the ``pool_size`` by default), and
+        return them to the pool, so that the first requests do not wait for
+        new connections.  Returns the number of connections opened.
+
+        """
+        total = 0
+        for engine in (self.engine, self.read_engine):
+            if engine is None:
+                continue
+            count = engine.pool.size() if n is None else n
+            connections = []
+            try:
+                for _ in range(count):
+                    connections.append(engine.connect())
+            finally:
+                for connection in connections:
+                    connection.close()
+            total += len(connections)
+        return total
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the :meth:`StatsQueuePool.stats` of the engine, and of the
+        read engine under the ``'read'`` key if there is one.  Only the
+        ``status`` of the pool is returned if the ``poolclass`` is changed
+        in the ``engine_options``.
+
+        """
+        stats = _pool_stats(self.engine.pool)
+        if self.read_engine is not None:
+            stats['read'] = _pool_stats(self.read_engine.pool)
+        return stats
+
+    def dispose(self) -> None:
+        """Remove the sessions and close all of the pooled connections.
+
+        """
+        self.Session.remove()
+        self.engine.dispose()
+        if self.read_engine is not None:
+            self.ReadSession.remove()
+            self.read_engine.dispose()
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+ids.py
+~~~~~~
+
+This module holds the strategies used by :meth:`BaseMixin.new_id` to create
+the ids of new rows, chosen with the ``id_strategy`` class attribute:
+
+* ``'uuid4'``:  a random ``UUID``, the default.
+* ``'uuid7'``:  a time ordered ``UUID`` version 7 (RFC 9562).
+* ``'ulid'``:  a time ordered ULID, as a ``UUID``.
+
+Random ids spread the inserts across the whole primary key index.  The time
+ordered ids start with the time in milliseconds, so new rows are appended
+near the end of the index, and rows created close in time are close in the
+index.  Both are monotonic in a process, ids created in the same millisecond
+still sort in the order they were created.
+
+Example::
+
+    class Event(DbModel):
+
+        id_strategy = 'uuid7'
+
+"""
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Dict
+
+_lock = threading.Lock()
+
+# The ``(milliseconds, counter)`` of the last UUIDv7.
+_last_uuid7 = (0, 0)
+
+# The ``(milliseconds, randomness)`` of the last ULID.
+_last_ulid = (0, 0)
+
+_RAND_A = (1 << 12) - 1
+_RANDOM = (1 << 80) - 1
+
+
+def _millis() -> int:
+    return time.time_ns() // 1000000
+
+
+def _random(bits: int) -> int:
+    return int.from_bytes(os.urandom((bits + 7) // 8), 'big') >> \
+        (-bits % 8)
+
+
+def uuid7() -> uuid.UUID:
+    """Return a new ``UUID`` version 7.  This is the unix time in
+    milliseconds, followed by a 12 bit counter (that starts at a random value
+    each millisecond) and 62 random bits.
+
+    """
+    global _last_uuid7
+    with _lock:
+        (millis, counter) = _last_uuid7
+        now = _millis()
+        if now > millis:
+            # leave room for the counter to increase in this millisecond.
+            millis, counter = now, _random(11)
+        else:
+            counter += 1
+            if counter > _RAND_A:
+                millis, counter = millis + 1, 0
+        _last_uuid7 = (millis, counter)
+
+    value = (millis & ((1 << 48) - 1)) << 80
+    value |= 0x7 << 76 | counter << 64
+    value |= 0x2 << 62 | _random(62)
+    return uuid.UUID(int=value)
+
+
+def ulid() -> uuid.UUID:
+    """Return a new ULID as a ``UUID``.  This is the unix time in milliseconds
+    followed by 80 random bits, that are incremented for ids created in the
+    same millisecond.
+
+    A ULID has no version or variant bits, it is stored and dumped as any
+    other ``UUID``.
+
+    """
+    global _last_ulid
+    with _lock:
+        (millis, randomness) = _last_ulid
+        now = _millis()
+        if now > millis:
+            millis, randomness = now, _random(80)
+        else:
+            randomness += 1
+            if randomness > _RANDOM:
+                millis, randomness = millis + 1, 0
+        _last_ulid = (millis, randomness)
+
+    return uuid.UUID(int=(millis & ((1 << 48) - 1)) << 80 | randomness)
+
+
+# The id strategies by name.
+STRATEGIES: Dict[str, Callable[[], uuid.UUID]] = {
+    'uuid4': uuid.uuid4,
+    'uuid7': uuid7,
+    'ulid': ulid,
+}
+
+
+def get_strategy(strategy) -> Callable[[], uuid.UUID]:
+    """Return the function of an id strategy.
+
+    :param strategy:  The name of a strategy in :data:`STRATEGIES`, or a
+                      function that returns a new id.
+
+    :raises ValueError:  If the strategy is not known.
+
+    """
+    if callable(strategy):
+        return strategy
+    try:
+        return STRATEGIES[strategy]
+    except (KeyError, TypeError):
+        raise ValueError('Unknown id strategy: {!r}'.format(strategy))
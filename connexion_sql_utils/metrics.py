@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+metrics.py
+~~~~~~~~~~
+
+This module holds the timing metrics for the ``crud`` functions.  When
+enabled, each call of a ``crud`` function records the time spent in each
+phase of the call, by model and operation (the name of the function):
+
+* ``query``:  executing the ``SQL`` statements.
+* ``hydrate``:  creating the instances from the rows.
+* ``dump``:  creating and encoding the dumped representation.
+* ``commit``:  committing the session of the :meth:`BaseMixin.session_scope`,
+  without the time of the flushed statements, which is in ``query``.
+* ``total``:  the whole call.
+
+Example::
+
+    sink = metrics.enable()
+    ...
+    print(metrics.prometheus_text(sink))
+
+A sink is any object with an ``observe(model, operation, phase, seconds)``
+method.  The default is a :class:`MemorySink`.  The metrics are disabled by
+default, in which case the only overhead is a check of a global.
+
+"""
+import bisect
+import contextvars
+import inspect
+import threading
+import time
+from functools import wraps
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# The default histogram buckets, in seconds.
+BUCKETS = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5,
+           5.0, 10.0)
+
+# The sink of the metrics, ``None`` when disabled.
+_sink = None
+
+# The ``(model, operation, timings)`` of the current operation.
+_current = contextvars.ContextVar('connexion_sql_utils_metrics',
+                                  default=None)
+
+
+class Histogram(object):
+    """A histogram of observed values.
+
+    :param buckets:  The sorted upper bounds of the buckets.
+
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Add a value to the histogram.
+
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> Iterable[Tuple[float, int]]:
+        """Yield the ``(upper bound, cumulative count)`` of the buckets,
+        ending with ``inf``.
+
+        """
+        total = 0
+        for (bound, count) in zip(self.buckets + (float('inf'),),
+                                  self.counts):
+            total += count
+            yield (bound, total)
+
+
+class MemorySink(object):
+    """A thread safe sink that keeps a :class:`Histogram` of the timings for
+    each ``(model, operation, phase)``.
+
+    :param buckets:  The upper bounds of the histogram buckets.
+
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, model: str, operation: str, phase: str,
+                seconds: float) -> None:
+        key = (model, operation, phase)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def snapshot(self) -> Dict[Tuple[str, str, str], Dict[str, float]]:
+        """Return the ``count`` and ``sum`` of each histogram.
+
+        """
+        with self._lock:
+            return {k: {'count': h.count, 'sum': h.sum}
+                    for (k, h) in self.histograms.items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+
+
+def _label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"') \
+        .replace('\n', '\\n')
+
+
+def prometheus_text(sink, name='connexion_sql_utils_seconds') -> str:
+    """Return the histograms of a :class:`MemorySink` in the Prometheus text
+    exposition format.
+
+    :param sink:  The :class:`MemorySink`.
+    :param name:  The name of the metric.
+
+    """
+    lines = ['# HELP {} Time spent in the phases of the crud operations.'
+             .format(name),
+             '# TYPE {} histogram'.format(name)]
+    with sink._lock:
+        items = sorted(sink.histograms.items())
+        for ((model, operation, phase), histogram) in items:
+            labels = 'model="{}",operation="{}",phase="{}"'.format(
+                _label(model), _label(operation), _label(phase))
+            for (bound, count) in histogram.cumulative():
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append('{}_bucket{{{},le="{}"}} {}'
+                             .format(name, labels, le, count))
+            lines.append('{}_sum{{{}}} {}'.format(name, labels,
+                                                  repr(histogram.sum)))
+            lines.append('{}_count{{{}}} {}'.format(name, labels,
+                                                    histogram.count))
+    return '\n'.join(lines) + '\n'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    if _current.get() is not None:
+        conn.info.setdefault('connexion_sql_utils_start', []).append(
+            time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    current = _current.get()
+    starts = conn.info.get('connexion_sql_utils_start')
+    if current is not None and starts:
+        timings = current[2]
+        timings['query'] = timings.get('query', 0.0) + \
+            time.perf_counter() - starts.pop()
+
+
+def enable(sink=None):
+    """Enable the metrics, and return the sink.
+
+    :param sink:  The sink for the metrics, defaults to a new
+                  :class:`MemorySink`.
+
+    """
+    global _sink
+    if sink is None:
+        sink = MemorySink()
+    if _sink is None:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    _sink = sink
+    return sink
+
+
+def disable() -> None:
+    """Disable the metrics.
+
+    """
+    global _sink
+    if _sink is not None:
+        event.remove(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.remove(Engine, 'after_cursor_execute', _after_cursor_execute)
+    _sink = None
+
+
+class _NoPhase(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_no_phase = _NoPhase()
+
+
+class _Phase(object):
+
+    def __init__(self, name, timings):
+        self.name = name
+        self.timings = timings
+
+    def __enter__(self):
+        self.query = self.timings.get('query', 0.0)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        # the time of the statements is only counted in the ``query`` phase.
+        elapsed = time.perf_counter() - self.start - \
+            (self.timings.get('query', 0.0) - self.query)
+        self.timings[self.name] = self.timings.get(self.name, 0.0) + elapsed
+        return False
+
+
+def phase(name: str):
+    """Return a context manager that adds the time spent in it to the
+    ``name`` phase of the current operation.  This does nothing if the
+    metrics are disabled, or outside of an operation.
+
+    """
+    current = _current.get() if _sink is not None else None
+    if current is None:
+        return _no_phase
+    return _Phase(name, current[2])
+
+
+def _observe(sink, model, operation, timings, start):
+    timings['total'] = time.perf_counter() - start
+    for (name, seconds) in timings.items():
+        sink.observe(model, operation, name, seconds)
+
+
+def instrument(fn):
+    """Record the phases of the calls of a ``crud`` function, by the name of
+    the asset (the first argument) and the function.
+
+    """
+    operation = fn.__name__
+
+    if inspect.iscoroutinefunction(fn):
+        @wraps(fn)
+        async def async_decorator(asset, *args, **kwargs):
+            sink = _sink
+            if sink is None:
+                return await fn(asset, *args, **kwargs)
+            start, timings = time.perf_counter(), {}
+            token = _current.set((asset.__name__, operation, timings))
+            try:
+                return await fn(asset, *args, **kwargs)
+            finally:
+                _current.reset(token)
+                _observe(sink, asset.__name__, operation, timings, start)
+        return async_decorator
+
+    @wraps(fn)
+    def decorator(asset, *args, **kwargs):
+        sink = _sink
+        if sink is None:
+            return fn(asset, *args, **kwargs)
+        start, timings = time.perf_counter(), {}
+        token = _current.set((asset.__name__, operation, timings))
+        try:
+            return fn(asset, *args, **kwargs)
+        finally:
+            _current.reset(token)
+            _observe(sink, asset.__name__, operation, timings, start)
+    return decorator
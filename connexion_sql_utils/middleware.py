@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+middleware.py
+~~~~~~~~~~~~~
+
+This module holds ``WSGI`` middleware to use with ``connexion`` (or any
+``WSGI`` application).
+
+"""
+import logging
+
+from .cache import LRUCache
+from .sqlmixins import _last_writes
+
+logger = logging.getLogger(__name__)
+
+
+class SessionMiddleware(object):
+    """``WSGI`` middleware that opens a :meth:`BaseMixin.session_scope` for
+    each request.  All of the database methods used during the request join
+    that scope, so they share one session (and connection) and are committed
+    once, at the end of the request.
+
+    The changes are rolled back instead if the response status is ``400``
+    or greater.
+
+    Responses with a ``Content-Length`` are buffered, and only sent once the
+    scope has committed, so that an error while committing is not reported
+    as a success.  Streamed responses (without a ``Content-Length``) are
+    iterated inside of the scope, so that they can use the session, and are
+    committed after the body is sent.
+
+    If the model declares a ``read_session_maker``, reads stay on the
+    primary for the ``read_after_write_window`` after a write in the same
+    request.  When a ``client_key`` is passed, reads also stay on the
+    primary after a write by the same client in an earlier request.
+
+    Example::
+
+        app = connexion.App(__name__)
+        app.add_api('swagger.yml')
+        app.app.wsgi_app = SessionMiddleware(app.app.wsgi_app, DbModel)
+
+    :param app:  The ``WSGI`` application to wrap.
+    :param model:  A :class:`BaseMixin` sub-class, which's ``session_scope``
+                   is used.
+    :param client_key:  An optional function that returns a key for the
+                        client of a request from the ``environ``, for
+                        example the ``REMOTE_ADDR`` or a user id.
+    :param max_clients:  The maximum number of clients to remember the last
+                         write for.
+
+    """
+
+    def __init__(self, app, model, client_key=None, max_clients=10000):
+        self.app = app
+        self.model = model
+        self.client_key = client_key
+        self.last_writes = LRUCache(maxsize=max_clients,
+                                    ttl=model.read_after_write_window)
+
+    def __call__(self, environ, start_response):
+        response = []
+        body = []
+
+        def _start_response(status_line, headers, exc_info=None):
+            # the response is only started once the scope is committed.
+            response[:] = [(status_line, headers, exc_info)]
+            return body.append
+
+        client = None
+        if self.client_key is not None:
+            client = self.client_key(environ)
+
+        # the writes are tracked per request.
+        token = _last_writes.set({})
+        try:
+            last_write = self.last_writes.get(client) \
+                if client is not None else None
+            if last_write is not None:
+                self.model.mark_write(last_write)
+
+            streamed = False
+            with self.model.session_scope() as session:
+                result = self.app(environ, _start_response)
+                try:
+                    chunks = iter(result)
+                    # an application may start the response with it's first
+                    # chunk.
+                    while not response:
+                        chunk = next(chunks, _END)
+                        if chunk is _END:
+                            break
+                        body.append(chunk)
+
+                    streamed = bool(response) and \
+                        not _has_length(response[0][1])
+                    if streamed:
+                        # a streamed body is iterated inside of the scope,
+                        # so that it can use the session.  It is committed
+                        # after the body is sent.
+                        start_response(*response[0])
+                        for chunk in body:
+                            yield chunk
+                        for chunk in chunks:
+                            yield chunk
+                    else:
+                        body.extend(chunks)
+                finally:
+                    if hasattr(result, 'close'):
+                        result.close()
+
+                if response and _status(response[0][0]) >= 400:
+                    logger.debug('Rolling back request:{}'
+                                 .format(response[0][0]))
+                    session.rollback()
+
+            if client is not None and self.model.last_write() != last_write:
+                self.last_writes.set(client, self.model.last_write())
+
+            if not streamed:
+                if not response:
+                    raise RuntimeError('The application did not start a '
+                                       'response')
+                start_response(*response[0])
+                for chunk in body:
+                    yield chunk
+        finally:
+            _last_writes.reset(token)
+
+
+# Marks the end of an iterator.
+_END = object()
+
+
+def _status(status_line) -> int:
+    return int(status_line.split(' ', 1)[0])
+
+
+def _has_length(headers) -> bool:
+    return any(k.lower() == 'content-length' for (k, _) in headers)
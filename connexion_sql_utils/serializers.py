@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+serializers.py
+~~~~~~~~~~~~~~
+
+This module holds the serializers used to encode the dumped representation
+of a database model.  A serializer is any object with a ``mimetype``
+attribute and a ``dumps`` method, that encodes an object to a ``str`` or
+``bytes``.
+
+The json serializer uses ``orjson`` when it is installed, falling back to
+the standard library ``json`` module.  Both handle ``Decimal``, ``UUID`` and
+``datetime`` values, so there is no need for ``to_json`` methods for those
+types.  A ``Decimal`` is encoded as a string by default, so that it keeps
+it's precision, pass ``decimal=float`` to a serializer to encode it as a
+number instead.
+
+When ``msgpack`` is installed a MessagePack serializer is registered, which
+the ``crud`` functions will use when a client asks for it in the ``Accept``
+header of a request.
+
+"""
+import datetime
+import decimal
+import json
+import uuid
+from collections import OrderedDict
+from typing import Any, Iterable
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+def _default(obj, decimal_type=str) -> Any:
+    """Convert values that can not be natively encoded.
+
+    :param decimal_type:  The type to convert a ``Decimal`` to.
+
+    :raises TypeError:  If the value can not be converted.
+
+    """
+    if isinstance(obj, decimal.Decimal):
+        return decimal_type(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    raise TypeError('Object of type {} is not serializable'
+                    .format(type(obj).__name__))
+
+
+class JSONSerializer(object):
+    """Encode objects as json.
+
+    :param fast:  Use ``orjson`` if it is installed.  If ``False`` or
+                  ``orjson`` is not installed, the standard library ``json``
+                  module is used.  Objects that ``orjson`` can not encode
+                  fall back to ``json``.
+    :param decimal:  The type to convert a ``Decimal`` to before it is
+                     encoded, ``str`` by default so that no precision is
+                     lost.
+
+    """
+    mimetype = 'application/json'
+
+    def __init__(self, fast=True, decimal=str):
+        self.fast = fast and orjson is not None
+        self.decimal = decimal
+
+    def _default(self, obj) -> Any:
+        return _default(obj, self.decimal)
+
+    def dumps(self, obj) -> str:
+        """Return a json string of ``obj``.
+
+        """
+        if self.fast is True:
+            try:
+                return orjson.dumps(obj, default=self._default,
+                                    option=orjson.OPT_NON_STR_KEYS) \
+                    .decode('utf-8')
+            except TypeError:
+                # values that ``orjson`` does not support, such as integers
+                # larger than 64 bits, are encoded with ``json``.
+                pass
+        return json.dumps(obj, default=self._default)
+
+
+class MsgPackSerializer(object):
+    """Encode objects as MessagePack.  This requires ``msgpack`` to be
+    installed.
+
+    :param decimal:  The type to convert a ``Decimal`` to before it is
+                     encoded, ``str`` by default so that no precision is
+                     lost.
+
+    """
+    mimetype = 'application/msgpack'
+
+    def __init__(self, decimal=str):
+        self.decimal = decimal
+
+    def _default(self, obj) -> Any:
+        return _default(obj, self.decimal)
+
+    def dumps(self, obj) -> bytes:
+        """Return the MessagePack bytes of ``obj``.
+
+        """
+        return msgpack.packb(obj, default=self._default, use_bin_type=True)
+
+
+json_serializer = JSONSerializer()
+
+_registry = OrderedDict()
+
+
+def register(serializer) -> None:
+    """Register a serializer to be available for content negotiation by
+    it's ``mimetype``.
+
+    """
+    _registry[serializer.mimetype] = serializer
+
+
+def registered() -> Iterable[Any]:
+    """Return the registered serializers.
+
+    """
+    return tuple(_registry.values())
+
+
+register(json_serializer)
+
+if msgpack is not None:  # pragma: no branch
+    register(MsgPackSerializer())
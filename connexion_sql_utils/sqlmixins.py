@@ -1,22 +1,50 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Set, Tuple
 
-from sqlalchemy import Column
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, and_, bindparam, insert, inspect, literal, \
+    or_, select, tuple_
 from sqlalchemy import event
 from sqlalchemy.ext.declarative import declared_attr
+from sqlalchemy.orm import load_only, object_session
+
+try:
+    from sqlalchemy import insert_sentinel
+except ImportError:  # pragma: no cover
+    insert_sentinel = None
 
 import uuid
 
 import contextlib
-import json
+import contextvars
+import datetime
 import logging
+import time
+import warnings
 
 from .base_mixin_abc import BaseMixinABC
+from .cache import table_versions
+from .debug import NPlusOneWarning, QueryCounter
 from .decorators import event_func
+from .ids import get_strategy
+from .metrics import phase
+from .serializers import json_serializer
+from .types import GUID, as_uuid, gen_random_uuid
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+# The sessions of the open (outer) ``session_scope``'s in the current
+# context, by ``session_maker``.
+_sessions = contextvars.ContextVar('connexion_sql_utils_sessions',
+                                   default={})
+
+# The key in ``Session.info`` of the invalidations to repeat on commit.
+_PENDING = 'connexion_sql_utils_invalidate'
+
+# The time of the last committed write in the current context, by
+# ``session_maker``.
+_last_writes = contextvars.ContextVar('connexion_sql_utils_last_writes',
+                                      default={})
+
 
 def _quote_if_str(string):
     """Used in the repr method to quote a string attribute.
@@ -27,9 +55,86 @@ def _quote_if_str(string):
     return string
 
 
+def _id_key(id) -> str:
+    """Return the canonical string of an id, used as the key of the
+    ``id_cache``, so that the forms of the same ``UUID`` share an entry.
+
+    """
+    try:
+        return str(as_uuid(id))
+    except ValueError:
+        return str(id)
+
+
+def _is_declared_attr(cls, name) -> bool:
+    """Check if the attribute ``name`` of the class is a ``declared_attr``,
+    without evaluating it.
+
+    """
+    for klass in cls.__mro__:
+        if name in vars(klass):
+            return isinstance(vars(klass)[name], declared_attr)
+    return False
+
+
+def _python_value(type_, value):
+    """Convert a json value to the python type of a column type.
+
+    :raises ValueError:  If the value can not be converted.
+
+    """
+    try:
+        python_type = type_.python_type
+    except NotImplementedError:
+        return value
+    if value is None or isinstance(value, python_type):
+        return value
+    try:
+        if python_type is uuid.UUID:
+            return as_uuid(value)
+        if python_type in (datetime.datetime, datetime.date, datetime.time):
+            return python_type.fromisoformat(value)
+        return python_type(value)
+    except (TypeError, ValueError) as err:
+        raise ValueError('Invalid value for {}: {!r}: {}'
+                         .format(type_, value, err))
+
+
+def _returning(dialect, statement) -> bool:
+    """Check if the dialect supports ``RETURNING`` for the statement type,
+    (``'update'`` or ``'delete'``), across sqlalchemy versions.
+
+    """
+    supported = getattr(dialect, statement + '_returning', None)
+    if supported is None:
+        supported = getattr(dialect, 'full_returning',
+                            getattr(dialect, 'implicit_returning', False))
+    return supported
+
+
+def _after_commit(session):
+    """Repeat the cache invalidations of a session once it has committed.
+
+    """
+    pending = session.info.get(_PENDING, ())
+    for (cls, id, clear) in pending:
+        cls._invalidate(None, id, clear)
+    for cls in set(cls for (cls, _, _) in pending):
+        cls.mark_write()
+
+
+def _after_transaction_end(session, transaction):
+    """Forget the cache invalidations of a session at the end of the outer
+    transaction.
+
+    """
+    if transaction.parent is None:
+        session.info.get(_PENDING, set()).clear()
+
+
 class BaseMixin(object):
-    """Base sqlalchemy mixin.  Adds id column as a postgresql.UUID column,
-    and will create the uuid before saving to the database.
+    """Base sqlalchemy mixin.  Adds id column as a :class:`types.GUID`
+    column, and will create the uuid before saving to the database.
 
     A user must define a ``session_maker`` on the mixin, to
     complete it as a classmethod or a staticmethod.
@@ -41,20 +146,156 @@ class BaseMixin(object):
     """
     dump_dict = False
 
-    id = Column(UUID(), primary_key=True)
+    # The serializer used to encode the instances in :meth:`dump`, see the
+    # ``serializers`` module.
+    serializer = json_serializer
+
+    # The hard maximum for the number of rows returned by a single
+    # ``crud.get`` call.  ``None`` means no maximum.
+    max_limit = None
+
+    # The maximum for the number of rows of a streamed ``crud.get``
+    # response.  Streams are capped at the ``max_limit`` when this is
+    # ``None``, so streaming more rows must be allowed explicitly.
+    max_stream_limit = None
+
+    # The attribute used to order keyset (cursor) pages, ``id`` is always
+    # used as the tie-breaker.  This should be a non-nullable, indexed
+    # column, ideally with a composite index on ``(sort_key, id)``.
+    sort_key = None
+
+    # Load instances in ``crud.put`` and ``crud.delete`` so that the ORM
+    # event listeners are called, instead of using a single statement.
+    orm_events = False
+
+    # Refuse to delete every row in :meth:`delete_where` when no filters
+    # are passed.
+    require_delete_filter = False
+
+    # An optional cache of the dumped instances by id used by
+    # :meth:`dump_id`, see the ``cache`` module.  This should be declared on
+    # each model, so that the models do not share a cache.
+    id_cache = None
+
+    # An optional cache of the dumped results of :meth:`dump_by`, see the
+    # ``cache`` module.  The entries are keyed by the version of the table,
+    # so any write invalidates all of them.
+    query_cache = None
+
+    # The name of a column that changes on every update of a row, such as a
+    # timestamp or an integer with an ``onupdate``, used to create the
+    # ``ETag`` of the ``crud`` responses without loading the rows.
+    version_column = None
+
+    # The number of seconds that reads stay on the primary ``session_maker``
+    # after a write in the same context (or by the same client, see
+    # ``SessionMiddleware``), when a ``read_session_maker`` is declared.
+    read_after_write_window = 5.0
+
+    # An optional session maker for a read replica, used by the read
+    # methods (``query_by``, ``get_id``...).  This should be declared like
+    # the ``session_maker``, as a staticmethod or classmethod on a sub-class.
+    read_session_maker = None
+
+    # Count the ``SQL`` statements of each ``session_scope``, and warn with
+    # a ``debug.NPlusOneWarning`` when a statement of the same shape runs
+    # ``n_plus_one_threshold`` times or more in one scope.  For debugging
+    # and tests, see the ``debug`` module.
+    debug_queries = False
+    n_plus_one_threshold = 5
+
+    # The strategy used by :meth:`new_id`, the name of a strategy in the
+    # ``ids`` module (``'uuid4'``, ``'uuid7'`` or ``'ulid'``) or a function
+    # that returns a new ``UUID``.  The time ordered strategies keep inserts
+    # near the end of the primary key index.
+    id_strategy = 'uuid4'
+
+    # Let the database create the ids, with a ``gen_random_uuid`` server
+    # default on the ``id`` column, instead of the ``create_id`` event.  The
+    # ids are fetched with ``RETURNING``, so the inserts of a flush (and of
+    # :meth:`save_many`) stay batched.  This must be set in the body of the
+    # model, before the ``id`` column is created.
+    #
+    # With ``sqlalchemy>=2.0.10`` this adds a nullable ``_sentinel`` integer
+    # column, that sqlalchemy uses to match the returned ids to the rows of
+    # a batch, as the order of the rows of ``RETURNING`` is not guaranteed.
+    server_id = False
+
+    @declared_attr
+    def id(cls):
+        if cls.server_id is True:
+            return Column(GUID(), primary_key=True,
+                          server_default=gen_random_uuid())
+        return Column(GUID(), primary_key=True)
+
+    @declared_attr
+    def _sentinel(cls):
+        if cls.server_id is True and insert_sentinel is not None:
+            return insert_sentinel('_sentinel')
+        return None
 
     @declared_attr
     def __tablename__(cls):
         return cls.__name__.lower()
 
+    @classmethod
+    def new_id(cls) -> uuid.UUID:
+        """Return a new unique id for an instance, created by the
+        ``id_strategy`` of the class.
+
+        """
+        return get_strategy(cls.id_strategy)()
+
     @staticmethod
     @event_func('before_insert')
     def create_id(mapper, connection, target):
         """Automatically creates a ``UUID`` before inserting a new
-        item.
+        item.  This is not registered when ``server_id`` is set.
 
         """
-        target.id = str(uuid.uuid4())
+        target.id = target.new_id()
+
+    @staticmethod
+    @event_func('after_insert', 'after_update', 'after_delete')
+    def invalidate_cache(mapper, connection, target):
+        """Bumps the table version, and removes an updated or deleted
+        instance from the ``id_cache``.
+
+        """
+        target._invalidate(object_session(target), target.id)
+
+    @classmethod
+    def table_version(cls) -> int:
+        """Return the version of the table, which is bumped by every write
+        through the class methods and events.
+
+        """
+        return table_versions.get(cls.__table__.fullname)
+
+    @classmethod
+    def _invalidate(cls, session, id=None, clear=False) -> None:
+        """Bump the version of the table and remove ``id`` from the
+        ``id_cache``, or clear the ``id_cache``.
+
+        This is repeated when the ``session`` commits, so that results read
+        before the commit are not cached for the new version.
+
+        """
+        table_versions.bump(cls.__table__.fullname)
+        if cls.id_cache is not None:
+            if clear is True:
+                cls.id_cache.clear()
+            elif id is not None:
+                cls.id_cache.pop(_id_key(id))
+
+        if session is not None:
+            pending = session.info.get(_PENDING)
+            if pending is None:
+                pending = session.info[_PENDING] = set()
+                event.listen(session, 'after_commit', _after_commit)
+                event.listen(session, 'after_transaction_end',
+                             _after_transaction_end)
+            pending.add((cls, id, clear))
 
     @classmethod
     def __declare_last__(cls):  # pragma: no cover
@@ -62,35 +303,183 @@ class BaseMixin(object):
                        getattr(getattr(cls, f), '_event_func', False) is True)
 
         for fn in event_funcs:
+            if cls.server_id is True and fn is cls.create_id:
+                continue
             for ename in fn._event_names:
                 event.listen(cls, ename, fn)
 
     @classmethod
-    def query_by(cls, session=None, **kwargs):
+    def keyset(cls) -> Tuple[str, ...]:
+        """Return the attribute names that keyset (cursor) pages are ordered
+        by.  This is the ``sort_key`` followed by ``id``.
+
+        """
+        if cls.sort_key is None or cls.sort_key == 'id':
+            return ('id',)
+        return (cls.sort_key, 'id')
+
+    @classmethod
+    def keyset_values(cls, values) -> Tuple[Any, ...]:
+        """Convert the :meth:`keyset` values of a decoded cursor (where every
+        value is a json value, such as a string) to the python types of the
+        columns, so they can be bound in :meth:`query_by`.
+
+        :param values:  A sequence of values, one for each :meth:`keyset`
+                        attribute.
+
+        :raises ValueError:  If there is the wrong number of values, or a
+                             value is not valid for it's column.
+
+        """
+        keys = cls.keyset()
+        if len(values) != len(keys):
+            raise ValueError('Expected {} keyset values: {!r}'
+                             .format(len(keys), values))
+        return tuple(_python_value(getattr(cls, k).type, v)
+                     for (k, v) in zip(keys, values))
+
+    @classmethod
+    def column_keys(cls) -> Tuple[str, ...]:
+        """Return the attribute names of the columns of the class.
+
+        """
+        return tuple(inspect(cls).column_attrs.keys())
+
+    @classmethod
+    def _load_only(cls, fields, extra=()):
+        """Return the column attributes to load for the ``fields``, names that
+        are not columns are ignored.  The ``id`` is always loaded.
+
+        """
+        column_keys = cls.column_keys()
+        keys = set(k for k in fields if k in column_keys)
+        keys.add('id')
+        keys.update(extra)
+        return [getattr(cls, k) for k in sorted(keys)]
+
+    @classmethod
+    def _query(cls, session, kwargs, limit=None, offset=None, after=None,
+               fields=None):
+        query = session.query(cls).filter_by(**kwargs)
+        if fields is not None:
+            extra = cls.keyset() if after is not None else ()
+            query = query.options(load_only(*cls._load_only(fields, extra)))
+        if after is not None:
+            columns = [getattr(cls, k) for k in cls.keyset()]
+            if len(after) > 0:
+                values = (literal(v, c.type) for (v, c) in zip(after, columns))
+                query = query.filter(tuple_(*columns) > tuple_(*values))
+            query = query.order_by(*columns)
+        elif limit is not None or offset is not None:
+            # ``LIMIT`` without an ``ORDER BY`` does not give stable pages.
+            query = query.order_by(cls.id)
+        if limit is not None:
+            query = query.limit(limit)
+        if offset is not None:
+            query = query.offset(offset)
+        return query
+
+    @classmethod
+    def query_by(cls, session=None, limit=None, offset=None, after=None,
+                 fields=None, **kwargs):
         """Return a query statement for the class.
 
         :param session:  An optional sqlalchemy session, if one is not passed
                          a session will be created for the query.
+        :param limit:  An optional ``LIMIT`` for the query.
+        :param offset:  An optional ``OFFSET`` for the query.
+        :param after:  An optional sequence of the :meth:`keyset` values of
+                       the last row of the previous page.  When passed the
+                       results are ordered by the :meth:`keyset` and start
+                       after these values, an empty sequence starts at the
+                       first row.
+        :param fields:  An optional sequence of attribute names, only these
+                        columns (and the primary key) are loaded.
         :param kwargs:  kwargs passed into the query to filter results.
 
         This would be simalar to::
 
             >>> session.query(MyDbModel).filter_by(id=1234)
 
+        When a ``limit`` or an ``offset`` is given the results are ordered by
+        ``id``, so that pages are stable across calls.
+
         """
         if session is not None:
-            return session.query(cls).filter_by(**kwargs)
+            return cls._query(session, kwargs, limit=limit, offset=offset,
+                              after=after, fields=fields)
 
-        with cls.session_scope() as session:
-            return session.query(cls).filter_by(**kwargs)
+        with cls._read_scope() as session:
+            return cls._query(session, kwargs, limit=limit, offset=offset,
+                              after=after, fields=fields)
 
     @classmethod
-    def get_id(cls, id, session=None):
+    def _versions_by(cls, session, limit, offset, kwargs):
+        column = getattr(cls, cls.version_column)
+        query = cls._query(session, kwargs, limit=limit, offset=offset)
+        return [(str(id), version) for (id, version) in
+                query.with_entities(cls.id, column)]
+
+    @classmethod
+    def versions_by(cls, session=None, limit=None, offset=None,
+                    **kwargs) -> List[Tuple[str, Any]]:
+        """Return the ``(id, version)`` of the rows matching the ``kwargs``,
+        in the same order as :meth:`query_by`, only selecting the ``id`` and
+        the ``version_column``.
+
+        :param session:  An optional sqlalchemy session, if one is not passed
+                         a session will be created for the query.
+        :param limit:  An optional ``LIMIT`` for the query.
+        :param offset:  An optional ``OFFSET`` for the query.
+        :param kwargs:  kwargs passed into the query to filter results.
+
+        :raises TypeError:  If the class does not declare a
+                            ``version_column``.
+
+        """
+        if cls.version_column is None:
+            raise TypeError('{} does not declare a version_column'
+                            .format(cls.__name__))
+
+        if session is not None:
+            return cls._versions_by(session, limit, offset, kwargs)
+
+        with cls._read_scope() as session:
+            return cls._versions_by(session, limit, offset, kwargs)
+
+    @classmethod
+    def stream_by(cls, chunk_size=1000, limit=None, offset=None, fields=None,
+                  **kwargs):
+        """Yield the instances of the class matching the ``kwargs`` one at a
+        time, fetching them from a server side cursor ``chunk_size`` rows at
+        a time.  This keeps memory flat no matter how many rows match.
+
+        A session is created for the lifetime of the generator.
+
+        :param chunk_size:  The number of rows to fetch from the database
+                            at a time.
+        :param limit:  An optional ``LIMIT`` for the query.
+        :param offset:  An optional ``OFFSET`` for the query.
+        :param fields:  An optional sequence of attribute names, only these
+                        columns (and the primary key) are loaded.
+        :param kwargs:  kwargs passed into the query to filter results.
+
+        """
+        with cls._read_scope() as session:
+            query = cls._query(session, kwargs, limit=limit, offset=offset,
+                               fields=fields)
+            for instance in query.yield_per(chunk_size):
+                yield instance
+
+    @classmethod
+    def get_id(cls, id, session=None, fields=None):
         """Get by id.
 
         :param id:  The unique identifier for the class.
         :param session:  An optional sqlalchemy session, if one is not passed
                          a session will be created for the query.
+        :param fields:  An optional sequence of attribute names, only these
+                        columns (and the primary key) are loaded.
 
         This is would be like::
 
@@ -98,16 +487,119 @@ class BaseMixin(object):
 
         """
         try:
-            return cls.query_by(id=id, session=session).first()
+            return cls.query_by(id=id, session=session, fields=fields).first()
         except:
             return None
 
+    @classmethod
+    def dump_id(cls, id, fields=None) -> Dict[str, Any]:
+        """Return the dict representation of an instance by id, or ``None``
+        if the id does not exist.
+
+        If the class has an ``id_cache`` the dumped instance is read through
+        the cache, the cache is invalidated by the ``save``, ``update`` and
+        ``delete`` methods and the ``after_update`` and ``after_delete``
+        events.  The cache is not used while the current session has
+        uncommitted writes.
+
+        :param id:  The unique identifier for the class.
+        :param fields:  An optional sequence of keys, only these keys are
+                        included.
+
+        """
+        cache = cls.id_cache
+        if cache is None or cls._has_writes():
+            with phase('hydrate'):
+                instance = cls.get_id(id, fields=fields)
+            if instance is None:
+                return None
+            return instance.dump(_dict=True, fields=fields)
+
+        # the full instance is cached, and filtered by the fields.
+        vals = cache.get(_id_key(id))
+        if vals is None:
+            with phase('hydrate'):
+                instance = cls.get_id(id)
+            if instance is None:
+                return None
+            vals = instance.dump(_dict=True)
+            # the callers get a copy, so that they can not change the cache.
+            cache.set(_id_key(id), dict(vals))
+
+        if fields is not None:
+            return {k: vals[k] for k in fields if k in vals}
+        return dict(vals)
+
+    @classmethod
+    def dump_by(cls, limit=None, offset=None, fields=None,
+                **kwargs) -> List[Dict[str, Any]]:
+        """Return the dict representations of the instances matching the
+        ``kwargs``, see :meth:`query_by`.
+
+        If the class has a ``query_cache`` the results are read through the
+        cache, keyed by the ``kwargs``, ``limit``, ``offset``, ``fields`` and
+        the :meth:`table_version`.  The results are not cached while the
+        current session has uncommitted writes.
+
+        :param limit:  The maximum number of instances.
+        :param offset:  The number of instances to skip.
+        :param fields:  An optional sequence of keys, only these keys are
+                        included.
+        :param kwargs:  kwargs used to filter the instances.
+
+        """
+        cache = cls.query_cache
+        key = cls._query_key(limit, offset, fields, kwargs)
+        if key is not None:
+            vals = cache.get(key)
+            if vals is not None:
+                return [dict(v) for v in vals]
+
+        # the query runs inside of the scope, so that a failed statement is
+        # rolled back.
+        with cls._read_scope() as session:
+            with phase('hydrate'):
+                instances = cls.query_by(session=session, limit=limit,
+                                         offset=offset, fields=fields,
+                                         **kwargs).all()
+            vals = cls.dump_many(instances, _dict=True, fields=fields)
+        if key is not None:
+            # the callers get copies, so that they can not change the cache.
+            cache.set(key, [dict(v) for v in vals])
+        return vals
+
+    @classmethod
+    def _query_key(cls, limit, offset, fields, kwargs):
+        """Return the ``query_cache`` key for :meth:`dump_by`, or ``None``
+        if the results should not be cached.
+
+        """
+        if cls.query_cache is None or cls._has_writes():
+            return None
+        key = (cls, cls.table_version(), tuple(sorted(kwargs.items())),
+               limit, offset, fields)
+        try:
+            hash(key)
+        except TypeError:
+            # un-hashable filters are not cached.
+            return None
+        return key
+
+    @classmethod
+    def _has_writes(cls) -> bool:
+        """Check if the current session has writes that are not committed.
+
+        """
+        session = cls.current_session()
+        return session is not None and bool(session.info.get(_PENDING))
+
     def _update(self, session, kwargs):
         for key in (k for k in vars(self.__class__)
                     if not k.startswith('_')):
             if kwargs.get(key, None) is not None:
                 setattr(self, key, kwargs[key])
         session.add(self)
+        self._invalidate(session, self.id)
 
     def update(self, session=None, **kwargs):
         """Update attributes on an instance.
@@ -124,6 +616,118 @@ class BaseMixin(object):
         with self.session_scope() as session:
             return self._update(session, kwargs)
 
+    @classmethod
+    def _from_row(cls, attrs, row):
+        """Create a (transient) instance from the values of a row.
+
+        """
+        instance = cls.__mapper__.class_manager.new_instance()
+        for (attr, value) in zip(attrs, row):
+            setattr(instance, attr.key, value)
+        return instance
+
+    @classmethod
+    def _update_id(cls, session, id, changes):
+        table = cls.__table__
+        attrs = list(inspect(cls).column_attrs)
+        columns = [a.columns[0] for a in attrs]
+        values = {a.columns[0]: changes[a.key] for a in attrs
+                  if a.key != 'id' and changes.get(a.key, None) is not None}
+
+        row = None
+        if values:
+            # only rows where a value changes are updated.
+            changed = or_(*(c.is_distinct_from(v)
+                            for (c, v) in values.items()))
+            stmt = table.update().where(and_(table.c.id == id, changed)) \
+                .values(values)
+            if _returning(session.connection().dialect, 'update'):
+                row = session.execute(stmt.returning(*columns)).first()
+                updated = row is not None
+            else:
+                updated = session.execute(stmt).rowcount > 0
+            # the caches are only invalidated when a row changes.
+            if updated:
+                cls._invalidate(session, id)
+
+        if row is None:
+            # nothing changed, or the id does not exist.
+            row = session.execute(
+                select(*columns).where(table.c.id == id)).first()
+        return cls._from_row(attrs, row) if row is not None else None
+
+    @classmethod
+    def update_id(cls, id, changes, session=None):
+        """Update a row by id, with a single ``UPDATE ... RETURNING``
+        statement, and return a (transient) instance of the updated row,
+        or ``None`` if the id does not exist.
+
+        Only the attributes that change are updated, if none change no
+        ``UPDATE`` is written at all.  Like :meth:`update`, attributes
+        that are ``None`` or not declared on the class are ignored.
+
+        Event listeners are not called for the update.
+
+        :param id:  The unique identifier for the row.
+        :param changes:  A dict of the attributes to update.
+        :param session:  An optional sqlalchemy session, if one is not passed
+                         a session will be created for the query.
+
+        """
+        if session is not None:
+            return cls._update_id(session, id, changes)
+
+        with cls.session_scope() as session:
+            return cls._update_id(session, id, changes)
+
+    @classmethod
+    def _update_many(cls, session, changes):
+        found = set(_id_key(id) for (id,) in session.query(cls.id)
+                    .filter(cls.id.in_(list(changes))))
+        ids = set(id for id in changes if _id_key(id) in found)
+
+        # group the rows that change the same columns, so that each group
+        # is a single ``executemany`` update.
+        groups = {}
+        for (id, vals) in changes.items():
+            if id in ids and vals:
+                row = {'_' + k: v for (k, v) in vals.items()}
+                row['__id'] = id
+                groups.setdefault(tuple(sorted(vals)), []).append(row)
+
+        table = cls.__table__
+        attrs = inspect(cls).column_attrs
+        for (keys, rows) in groups.items():
+            stmt = table.update().where(table.c.id == bindparam('__id'))
+            stmt = stmt.values({attrs[k].columns[0]: bindparam('_' + k)
+                                for k in keys})
+            session.execute(stmt, rows)
+
+        for id in ids:
+            cls._invalidate(session, id)
+        return ids
+
+    @classmethod
+    def update_many(cls, changes, session=None) -> Set[str]:
+        """Update many rows by id in a single transaction, without loading
+        them.  Rows that change the same attributes are updated with a single
+        ``executemany`` style update.  Returns the ids that were found, as
+        they are passed in the ``changes``.
+
+        Event listeners are not called for the updates.
+
+        :param changes:  A mapping of id to a dict of the attributes to
+                         change for that id.
+        :param session:  An optional sqlalchemy session, if one is not passed
+                         a session will be created for the query.
+
+        """
+        if session is not None:
+            return cls._update_many(session, changes)
+
+        with cls.session_scope() as session:
+            return cls._update_many(session, changes)
+
     def save(self, session=None):
         """Save an instance to the database.
 
@@ -132,10 +736,51 @@ class BaseMixin(object):
 
         """
         if session is not None:
-            return session.add(self)
+            return self._save(session)
 
         with self.session_scope() as session:
-            return session.add(self)
+            return self._save(session)
+
+    def _save(self, session):
+        session.add(self)
+        self._invalidate(session, self.id)
+
+    @classmethod
+    def _save_many(cls, session, items):
+        cls._invalidate(session)
+        dialect = session.connection().dialect
+        # ``insert_sentinel`` marks a sqlalchemy (2.0.10 or later) with ORM
+        # bulk inserts that return the rows in the order of the items.
+        if cls.server_id is True and insert_sentinel is not None and \
+                getattr(dialect, 'insert_executemany_returning', False):
+            stmt = insert(cls).returning(cls.id, sort_by_parameter_order=True)
+            return [str(id) for id in session.scalars(stmt, list(items))]
+
+        ids = [cls.new_id() for _ in items]
+        session.bulk_insert_mappings(
+            cls, [dict(item, id=id) for (item, id) in zip(items, ids)])
+        return [str(id) for id in ids]
+
+    @classmethod
+    def save_many(cls, items, session=None) -> List[str]:
+        """Insert many rows in a single transaction, using ``executemany``
+        style bulk inserts, and return their new ids.
+
+        The ids are created with :meth:`new_id`, or by the database with
+        ``RETURNING`` when ``server_id`` is set and the dialect supports
+        ``RETURNING`` with ``executemany``.  Other ``before_insert`` event
+        listeners are not called.
+
+        :param items:  A sequence of dicts of the attributes for each row.
+        :param session:  An optional sqlalchemy session, if one is not passed
+                         a session will be created for the query.
+
+        """
+        if session is not None:
+            return cls._save_many(session, items)
+
+        with cls.session_scope() as session:
+            return cls._save_many(session, items)
 
     def delete(self, session=None):
         """Delete an instance from the database.
@@ -145,51 +790,300 @@ class BaseMixin(object):
 
         """
         if session is not None:
-            return session.delete(self)
+            return self._delete(session)
         with self.session_scope() as session:
-            return session.delete(self)
+            return self._delete(session)
+
+    def _delete(self, session):
+        session.delete(self)
+        self._invalidate(session, self.id)
+
+    @classmethod
+    def _delete_id(cls, session, id):
+        cls._invalidate(session, id)
+        table = cls.__table__
+        stmt = table.delete().where(table.c.id == id)
+        if _returning(session.connection().dialect, 'delete'):
+            return session.execute(stmt.returning(table.c.id)).first() \
+                is not None
+        return session.execute(stmt).rowcount > 0
+
+    @classmethod
+    def delete_id(cls, id, session=None) -> bool:
+        """Delete a row by id with a single ``DELETE ... RETURNING``
+        statement, without loading it.  Returns ``True`` if the row was
+        deleted, or ``False`` if the id does not exist.
+
+        Event listeners are not called for the delete.
+
+        :param id:  The unique identifier for the row.
+        :param session:  An optional sqlalchemy session, if one is not passed
+                         a session will be created for the query.
+
+        """
+        if session is not None:
+            return cls._delete_id(session, id)
+
+        with cls.session_scope() as session:
+            return cls._delete_id(session, id)
+
+    @classmethod
+    def _delete_where(cls, session, kwargs):
+        cls._invalidate(session, clear=True)
+        return session.query(cls).filter_by(**kwargs).delete(
+            synchronize_session=False)
+
+    @classmethod
+    def delete_where(cls, session=None, **kwargs) -> int:
+        """Delete the rows matching the ``kwargs`` with a single
+        ``DELETE ... WHERE`` statement, without loading them, and return the
+        number of rows deleted.
+
+        Event listeners are not called for the deletes.
+
+        :param session:  An optional sqlalchemy session, if one is not passed
+                         a session will be created for the query.
+        :param kwargs:  kwargs used to filter the rows to delete, like
+                        :meth:`query_by`.
+
+        :raises ValueError:  If no ``kwargs`` are passed and the class
+                             attribute ``require_delete_filter`` is true.
+
+        """
+        if not kwargs and cls.require_delete_filter is True:
+            raise ValueError('Refusing to delete all rows of {}'
+                             .format(cls.__name__))
+
+        if session is not None:
+            return cls._delete_where(session, kwargs)
+
+        with cls.session_scope() as session:
+            return cls._delete_where(session, kwargs)
 
     def _asDict(self) -> Dict[str, Any]:
-        """Return a ``dict`` representation of the instance.
+        """Return a ``dict`` representation of the instance.  The ``UUID``
+        values of the :meth:`_uuid_keys` are converted to strings.
 
         """
-        return {k: v for (k, v) in vars(self).items() if not
+        vals = {k: v for (k, v) in vars(self).items() if not
                 k.startswith('_')}
+        for key in self._uuid_keys():
+            if isinstance(vals.get(key), uuid.UUID):
+                vals[key] = str(vals[key])
+        return vals
+
+    @classmethod
+    def _uuid_keys(cls) -> Tuple[str, ...]:
+        """Return the attribute names of the :class:`types.GUID` columns,
+        which are dumped as strings.  Like the dump plan, this is stored on
+        the class after the first call.
 
-    def dump(self, _dict=None) -> str:
+        """
+        keys = cls.__dict__.get('_uuid_key_plan')
+        if keys is None:
+            mapper = inspect(cls, raiseerr=False)
+            if mapper is None:
+                keys = ('id',)
+            else:
+                keys = tuple(a.key for a in mapper.column_attrs
+                             if isinstance(a.columns[0].type, GUID))
+            cls._uuid_key_plan = keys
+        return keys
+
+    @classmethod
+    def _get_dump_plan(cls):
+        """Return the names of the ``to_json`` (with their keys) and the
+        ``dump_method`` functions declared on the class.
+
+        The class is only scanned on the first call, the plan is then stored
+        on the class so that :meth:`dump` does not need to search for them.
+
+        """
+        plan = cls.__dict__.get('_dump_plan')
+        if plan is None:
+            to_json_funcs, dump_funcs = [], []
+            for name in dir(cls):
+                if _is_declared_attr(cls, name):
+                    # the columns are not functions, and reading a declared
+                    # attribute of an un-mapped class warns.
+                    continue
+                attr = getattr(cls, name, None)
+                if hasattr(attr, '_to_json'):
+                    to_json_funcs.append((name, attr._keys))
+                if hasattr(attr, '_dump_method'):
+                    dump_funcs.append(name)
+            plan = (tuple(to_json_funcs), tuple(dump_funcs))
+            cls._dump_plan = plan
+        return plan
+
+    def dump(self, _dict=None, fields=None) -> str:
         """Return a json serialized string or a dict representation of the
         instance.
 
         Any methods that are wrapped with ``to_json`` decorator
         will be called on the values before returning the json
-        string.
+        string.  The values are encoded with the ``serializer`` of the
+        class.
 
         :param _dict:  If ``True`` return a dict instead of a json string,
                        or the class attribute ``dump_dict`` is true on a
                        sub-class.
+        :param fields:  An optional sequence of keys, only these keys are
+                        included.
 
         .. see-also::
 
             :class:`decorators.to_json`
 
         """
-        dump_dict = _dict or self.dump_dict
-        vals = self._asDict()
-        to_json_funcs = (getattr(self, f) for f in dir(self)
-                         if hasattr(getattr(self, f), '_to_json'))
+        with phase('dump'):
+            dump_dict = _dict or self.dump_dict
+            vals = self._asDict()
+            to_json_funcs, dump_funcs = self._get_dump_plan()
 
-        for fn in to_json_funcs:
-            for key in fn._keys:
-                if key in vals:
-                    vals[key] = fn(vals[key])
+            for (name, keys) in to_json_funcs:
+                fn = getattr(self, name)
+                for key in keys:
+                    if key in vals:
+                        vals[key] = fn(vals[key])
 
-        dump_funcs = (getattr(self, f) for f in dir(self)
-                      if hasattr(getattr(self, f), '_dump_method'))
+            for name in dump_funcs:
+                vals = getattr(self, name)(vals)
 
-        for fn in dump_funcs:
-            vals = fn(vals)
+            if fields is not None:
+                vals = {k: vals[k] for k in fields if k in vals}
 
-        return vals if dump_dict is True else json.dumps(vals)
+            return vals if dump_dict is True else self.serializer.dumps(vals)
+
+    @classmethod
+    def dump_many(cls, instances, _dict=None, fields=None) -> str:
+        """Return a json serialized array or a list of dict representations
+        of the instances.  The instances are dumped as dicts and the array is
+        encoded once, instead of encoding every instance separately.
+
+        :param instances:  An iterable of instances of the class.
+        :param _dict:  If ``True`` return a list of dicts instead of a json
+                       string, or the class attribute ``dump_dict`` is true
+                       on a sub-class.
+        :param fields:  An optional sequence of keys, only these keys are
+                        included.
+
+        """
+        dump_dict = _dict or cls.dump_dict
+        vals = [instance.dump(_dict=True, fields=fields)
+                for instance in instances]
+        return vals if dump_dict is True else cls.serializer.dumps(vals)
+
+    @classmethod
+    def _session_key(cls):
+        maker = cls.session_maker
+        return getattr(maker, '__func__', maker)
+
+    @classmethod
+    def current_session(cls):
+        """Return the session of the outer :meth:`session_scope` that is open
+        in the current context, or ``None``.
+
+        """
+        return _sessions.get().get(cls._session_key())
+
+    @classmethod
+    def last_write(cls):
+        """Return the ``time.monotonic`` time of the last committed write in
+        the current context, or ``None``.
+
+        """
+        return _last_writes.get().get(cls._session_key())
+
+    @classmethod
+    def mark_write(cls, when=None) -> None:
+        """Record a write in the current context, so that reads stay on the
+        primary for the ``read_after_write_window``.  This is called when a
+        session with writes commits.
+
+        :param when:  The ``time.monotonic`` time of the write, defaults to
+                      now.
+
+        """
+        writes = dict(_last_writes.get())
+        writes[cls._session_key()] = time.monotonic() if when is None \
+            else when
+        _last_writes.set(writes)
+
+    @classmethod
+    def _use_replica(cls) -> bool:
+        """Check if reads should use the ``read_session_maker``.  Reads stay
+        on the primary while the current session has uncommitted writes, and
+        for the ``read_after_write_window`` after a write.
+
+        """
+        if cls.read_session_maker is None or cls._has_writes():
+            return False
+        last_write = cls.last_write()
+        return last_write is None or \
+            time.monotonic() - last_write >= cls.read_after_write_window
+
+    @classmethod
+    @contextlib.contextmanager
+    def _read_scope(cls):
+        """A context manager for a session used to read.  This is a
+        ``read_session_maker`` session if one is declared (see
+        :meth:`_use_replica`), else this joins the current session without
+        a ``SAVEPOINT``, as there is nothing to roll back.
+
+        """
+        if cls._use_replica():
+            session = cls.read_session_maker()
+            try:
+                yield session
+            finally:
+                session.close()
+            return
+
+        session = cls.current_session()
+        if session is not None:
+            yield session
+            return
+
+        with cls.session_scope() as session:
+            yield session
+
+    @classmethod
+    @contextlib.contextmanager
+    def _nested_scope(cls, session):
+        savepoint = session.begin_nested()
+        try:
+            yield session
+            if savepoint.is_active:
+                savepoint.commit()
+        except Exception as err:
+            # a failed flush leaves the savepoint inactive, but not closed.
+            if savepoint.session is not None:
+                savepoint.rollback()
+            logger.debug('error commiting savepoint: {}'.format(err))
+            raise
+
+    @classmethod
+    @contextlib.contextmanager
+    def _count_queries(cls):
+        """A context manager that counts the statements run inside of it
+        when ``debug_queries`` is set, and warns about ``N+1`` patterns.
+
+        """
+        if cls.debug_queries is not True:
+            yield None
+            return
+
+        with QueryCounter() as counter:
+            yield counter
+
+        logger.debug('{} statements in a session_scope of {}'
+                     .format(counter.count, cls.__name__))
+        repeated = counter.repeated(cls.n_plus_one_threshold)
+        for (shape, count) in repeated.items():
+            warnings.warn(NPlusOneWarning(
+                '{} statements of the same shape in a session_scope of {}: '
+                '{}'.format(count, cls.__name__, shape)), stacklevel=4)
 
     @classmethod
     @contextlib.contextmanager
@@ -202,19 +1096,36 @@ class BaseMixin(object):
         The session will automatically try to commit any changes, rolling back
         on any errors, and finally closing the session.
 
+        Scopes are reentrant.  While a scope is open, any other scope for the
+        same ``session_maker`` in the same context (thread or task) joins it
+        and yields the same session, inside of a ``SAVEPOINT`` that is rolled
+        back on errors.  The outer scope commits and closes the session.
+
         """
         if not issubclass(cls, BaseMixinABC):
             raise TypeError('Must declare a session maker method.')
 
+        session = cls.current_session()
+        if session is not None:
+            with cls._nested_scope(session) as session:
+                yield session
+            return
+
         session = cls.session_maker()
+        sessions = dict(_sessions.get())
+        sessions[cls._session_key()] = session
+        token = _sessions.set(sessions)
         try:
-            yield session
-            session.commit()
+            with cls._count_queries():
+                yield session
+                with phase('commit'):
+                    session.commit()
         except Exception as err:
             session.rollback()
             logger.debug('error commiting: {}'.format(err))
             raise
         finally:
+            _sessions.reset(token)
             session.close()
 
     def __str__(self) -> str:
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+types.py
+~~~~~~~~
+
+This module holds the portable column types used by the database models.
+
+:class:`GUID` stores a ``UUID`` in the native ``uuid`` type on Postgres, and
+as 16 bytes (``BINARY(16)``) on the other backends, such as SQLite and MySQL,
+instead of a 36 character string.  The values are ``uuid.UUID`` objects in
+python, they are only converted to strings when an instance is dumped.
+
+Example::
+
+    class Bar(DbModel):
+
+        foo_id = Column(GUID(), ForeignKey('foo.id'), nullable=False)
+
+:class:`gen_random_uuid` is a ``SQL`` function for the server default of a
+:class:`GUID` column, so that the database creates the ids.
+
+"""
+import uuid
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.types import BINARY, TypeDecorator
+
+
+def as_uuid(value) -> uuid.UUID:
+    """Convert a value to a ``uuid.UUID``.  Accepts a ``UUID``, the 16 bytes
+    of a ``UUID``, or any string form accepted by ``uuid.UUID``.
+
+    :raises ValueError:  If the value is not a valid ``UUID``.
+
+    """
+    if isinstance(value, uuid.UUID):
+        return value
+    if isinstance(value, (bytes, bytearray, memoryview)) and len(value) == 16:
+        return uuid.UUID(bytes=bytes(value))
+    return uuid.UUID(str(value))
+
+
+class GUID(TypeDecorator):
+    """A ``UUID`` column, that uses the native ``uuid`` type on Postgres and
+    ``BINARY(16)`` on the other backends.  Bound values can be a ``UUID`` or
+    a string, the loaded values are always a ``uuid.UUID``.
+
+    """
+    impl = BINARY(16)
+    cache_ok = True
+
+    @property
+    def python_type(self):
+        return uuid.UUID
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=True))
+        return dialect.type_descriptor(BINARY(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        value = as_uuid(value)
+        if dialect.name == 'postgresql':
+            return value
+        return value.bytes
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return as_uuid(value)
+
+
+class gen_random_uuid(FunctionElement):
+    """A random ``UUID`` created by the database, for the ``server_default``
+    of a :class:`GUID` column.  This is ``gen_random_uuid()`` on Postgres
+    (13 and later), and 16 random bytes on SQLite and MySQL.
+
+    Example::
+
+        id = Column(GUID(), primary_key=True,
+                    server_default=gen_random_uuid())
+
+    """
+    type = GUID()
+    name = 'gen_random_uuid'
+    inherit_cache = True
+
+
+@compiles(gen_random_uuid)
+def _gen_random_uuid(element, compiler, **kwargs):
+    return 'gen_random_uuid()'
+
+
+@compiles(gen_random_uuid, 'sqlite')
+def _gen_random_uuid_sqlite(element, compiler, **kwargs):
+    # an expression default must be in parentheses on SQLite.
+    return '(randomblob(16))'
+
+
+@compiles(gen_random_uuid, 'mysql')
+@compiles(gen_random_uuid, 'mariadb')
+def _gen_random_uuid_mysql(element, compiler, **kwargs):
+    return '(UUID_TO_BIN(UUID()))'
@@ -6,11 +6,10 @@ import logging
 
 import connexion
 
-from sqlalchemy import Column, String, Numeric, create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy import Column, String, Numeric
 
-from connexion_sql_utils import BaseMixin, to_json, event_func, dump_method
+from connexion_sql_utils import Database, to_json, event_func, dump_method
+from connexion_sql_utils import SessionMiddleware
 from connexion_sql_utils import crud
 
 # Most of this would typically be in a different module, but since
@@ -23,7 +22,7 @@ DB_PORT = os.environ.get('DB_PORT', 5432)
 DB_NAME = os.environ.get('DB_NAME', 'postgres')
 
 
-DB_URI = 'postgres+psycopg2://{user}:{password}@{host}:{port}/{db}'.format(
+DB_URI = 'postgresql+psycopg2://{user}:{password}@{host}:{port}/{db}'.format(
     user=DB_USER,
     password=DB_PASSWORD,
     host=DB_HOST,
@@ -31,30 +30,15 @@ DB_URI = 'postgres+psycopg2://{user}:{password}@{host}:{port}/{db}'.format(
     db=DB_NAME
 )
 
-engine = create_engine(DB_URI)
-
-Session = scoped_session(
-    sessionmaker(autocommit=False, autoflush=False, bind=engine,
-                 expire_on_commit=False)
-)
-
-
-# The only method required to complete the mixin is to add a staticmethod
-# that should return a session.  This is used in the queries.
-class MyBase(BaseMixin):
-
-    # give the models an access to a session.
-    @staticmethod
-    def session_maker():
-        return Session()
-
-
-# By attaching the ``session_maker`` method to the class we now create a
-# ``declarative_base`` to be used.  The ``BaseMixin`` class declares an
-# ``id`` column, that is ``postgresql.UUID``.  It also has an declared attr
-# for the __tablename__.  If you would to override these, they can be declared
-# when create your database model
-DbModel = declarative_base(cls=MyBase)
+# ``Database`` creates the engine and a session factory, and a
+# ``declarative_base`` of the ``BaseMixin`` with a ``session_maker`` that
+# uses it.  The ``BaseMixin`` class declares an ``id`` column, that is a
+# ``GUID`` (native ``uuid`` on Postgres, 16 bytes on other databases).  It
+# also has an declared attr for the __tablename__.
+# If you would to override these, they can be declared when create your
+# database model.  ``db.stats()`` returns the live state of the pool.
+db = Database(DB_URI, pool_size=10, max_overflow=5)
+DbModel = db.Base
 
 
 class Foo(DbModel):
@@ -62,6 +46,10 @@ class Foo(DbModel):
     bar = Column(String(40), nullable=False)
     baz = Column(Numeric, nullable=True)
 
+    # ``crud.put`` and ``crud.delete`` use single statements that skip the
+    # ORM, so tell them to load the instances, to call ``lower_baz`` below.
+    orm_events = True
+
     # a method to be called to help in the conversion to json.
     @to_json('baz')
     def convert_decimal(self, val):
@@ -98,8 +86,13 @@ delete_foo = partial(crud.delete, Foo, foo_id=None)
 app = connexion.App(__name__)
 app.add_api('swagger.yml')
 
+# share one session (and one commit) for all the database work in a request.
+app.app.wsgi_app = SessionMiddleware(app.app.wsgi_app, DbModel)
+
 
 if __name__ == '__main__':
     port = os.environ.get('APP_PORT', 8080)
-    DbModel.metadata.create_all(bind=engine)
+    DbModel.metadata.create_all(bind=db.engine)
+    # open the pool's connections before serving the first requests.
+    db.warm()
     app.run(debug=True, port=int(port))
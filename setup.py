@@ -12,10 +12,16 @@ with open('HISTORY.rst') as history_file:
 requirements = [
     # TODO: put package requirements here
     'connexion==1.1.5',
-    'sqlalchemy>=1.1.6',
+    'sqlalchemy>=1.4',
     'psycopg2>=2.7',
 ]
 
+extra_requirements = {
+    'fast': ['orjson'],
+    'msgpack': ['msgpack'],
+    'asyncio': ['sqlalchemy[asyncio]>=1.4'],
+}
+
 test_requirements = [
     # TODO: put package test requirements here
 ]
@@ -35,6 +41,8 @@ setup(
                  'connexion_sql_utils'},
     include_package_data=True,
     install_requires=requirements,
+    python_requires='>=3.7',
+    extras_require=extra_requirements,
     license="MIT license",
     zip_safe=False,
     keywords='connexion_sql_utils',
@@ -43,8 +51,7 @@ setup(
         'Intended Audience :: Developers',
         'License :: OSI Approved :: MIT License',
         'Natural Language :: English',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.7',
     ],
     test_suite='tests',
     tests_require=test_requirements
@@ -1,8 +1,8 @@
 import pytest
 import os
-from sqlalchemy import create_engine, Column, String
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy import create_engine, Column, Integer, String, \
+    literal_column
+from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
 
 from connexion_sql_utils import BaseMixin, post, dump_method
 
@@ -13,7 +13,7 @@ DB_PORT = os.environ.get('DB_PORT', 5432)
 DB_NAME = os.environ.get('DB_NAME', 'postgres')
 
 
-URI = 'postgres+psycopg2://{user}:{password}@{host}:{port}/{db}'.format(
+URI = 'postgresql+psycopg2://{user}:{password}@{host}:{port}/{db}'.format(
     user=DB_USER,
     password=DB_PASSWORD,
     host=DB_HOST,
@@ -24,7 +24,7 @@ URI = 'postgres+psycopg2://{user}:{password}@{host}:{port}/{db}'.format(
 engine = create_engine(URI)
 
 Session = scoped_session(
-    sessionmaker(autocommit=False, autoflush=False, bind=engine,
+    sessionmaker(autoflush=False, bind=engine,
                  expire_on_commit=False)
 )
 
@@ -51,6 +51,22 @@ class Foo(Base):
         return vals
 
 
+class Versioned(Base):
+
+    version_column = 'version'
+
+    bar = Column(String(), nullable=True)
+    version = Column(Integer, nullable=False, default=1,
+                     onupdate=literal_column('version + 1'))
+
+
+class ServerFoo(Base):
+
+    server_id = True
+
+    bar = Column(String(), nullable=True)
+
+
 @pytest.fixture(scope='module', autouse=True)
 def create_all():
     Base.metadata.create_all(bind=engine)
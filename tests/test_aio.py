@@ -0,0 +1,185 @@
+import asyncio
+import contextlib
+import uuid
+
+import pytest
+from sqlalchemy import Column, String
+from sqlalchemy.orm import declarative_base
+
+from connexion_sql_utils import AsyncBaseMixin, LRUCache, QueryCache, \
+    async_delete, async_get, async_get_id, async_post, async_put
+
+pytest.importorskip('aiosqlite')
+asyncio_ext = pytest.importorskip('sqlalchemy.ext.asyncio')
+
+Session = asyncio_ext.async_sessionmaker(expire_on_commit=False)
+
+
+class MyBase(AsyncBaseMixin):
+
+    @staticmethod
+    def session_maker():
+        return Session()
+
+
+Base = declarative_base(cls=MyBase)
+
+
+class Baz(Base):
+
+    bar = Column(String(), nullable=True)
+
+
+class EventBaz(Base):
+
+    orm_events = True
+
+    bar = Column(String(), nullable=True)
+
+
+@contextlib.asynccontextmanager
+async def database(path):
+    engine = asyncio_ext.create_async_engine(
+        'sqlite+aiosqlite:///{}'.format(path / 'aio.db'))
+    Session.configure(bind=engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        yield engine
+    finally:
+        await engine.dispose()
+
+
+def test_async_base_mixin(tmp_path):
+    async def main():
+        async with database(tmp_path):
+            baz = Baz(bar='one')
+            await baz.save()
+            assert baz.id is not None
+            assert (await Baz.get_id(baz.id)).bar == 'one'
+            assert await Baz.get_id(str(uuid.uuid4())) is None
+
+            await baz.update(bar='two')
+            assert [b.bar for b in await Baz.query_by(bar='two')] == ['two']
+
+            assert (await Baz.update_id(baz.id, {'bar': 'three'})).bar == \
+                'three'
+            ids = await Baz.save_many([{'bar': 'many'}, {'bar': 'many'}])
+            assert await Baz.update_many({ids[0]: {'bar': 'many-new'}}) == \
+                set(ids[:1])
+            assert len(await Baz.query_by(limit=2)) == 2
+
+            await baz.delete()
+            assert await Baz.get_id(baz.id) is None
+            assert await Baz.delete_id(ids[0]) is True
+            assert await Baz.delete_where(bar='many') == 1
+
+    asyncio.run(main())
+
+
+def test_async_stream_by(tmp_path):
+    async def main():
+        async with database(tmp_path):
+            await Baz.save_many([{'bar': 'stream-{}'.format(i)}
+                                 for i in range(5)])
+            streamed = [b async for b in Baz.stream_by(chunk_size=2, limit=4,
+                                                       fields=('bar',))]
+            assert len(streamed) == 4
+            assert all(b.bar.startswith('stream-') for b in streamed)
+            assert [b.id for b in streamed] == sorted(b.id for b in streamed)
+
+    asyncio.run(main())
+
+
+def test_async_dumps_return_copies_of_the_caches(tmp_path, monkeypatch):
+    monkeypatch.setattr(Baz, 'id_cache', LRUCache())
+
+    async def main():
+        async with database(tmp_path):
+            (id,) = await Baz.save_many([{'bar': 'cached'}])
+            (await Baz.dump_id(id))['bar'] = 'changed'
+            (await Baz.dump_id(id))['bar'] = 'changed'
+            assert (await Baz.dump_id(id))['bar'] == 'cached'
+
+            monkeypatch.setattr(Baz, 'query_cache', QueryCache())
+            (await Baz.dump_by(bar='cached'))[0]['bar'] = 'changed'
+            (await Baz.dump_by(bar='cached'))[0]['bar'] = 'changed'
+            assert (await Baz.dump_by(bar='cached'))[0]['bar'] == 'cached'
+
+    asyncio.run(main())
+
+
+def test_async_propagates_cancel(tmp_path, monkeypatch):
+    def cancelled(*args):
+        raise asyncio.CancelledError()
+
+    async def main():
+        async with database(tmp_path):
+            monkeypatch.setattr(Baz, '_first', classmethod(cancelled))
+            with pytest.raises(asyncio.CancelledError):
+                await Baz.get_id(str(uuid.uuid4()))
+            monkeypatch.setattr(Baz, '_update_id', classmethod(cancelled))
+            with pytest.raises(asyncio.CancelledError):
+                await async_put(Baz, baz_id=str(uuid.uuid4()),
+                                baz={'bar': 'cancelled'})
+            monkeypatch.setattr(Baz, '_delete_id', classmethod(cancelled))
+            with pytest.raises(asyncio.CancelledError):
+                await async_delete(Baz, baz_id=str(uuid.uuid4()))
+
+    asyncio.run(main())
+
+
+def test_async_session_scope_is_reentrant(tmp_path):
+    async def main():
+        async with database(tmp_path):
+            async with Baz.session_scope() as outer:
+                assert Baz.current_session() is outer
+                async with Baz.session_scope() as inner:
+                    assert inner is outer
+                await Baz(bar='outer').save()
+                with pytest.raises(Exception):
+                    async with Baz.session_scope() as inner:
+                        await Baz(bar='rolled-back').save()
+                        raise ValueError()
+            assert Baz.current_session() is None
+            assert len(await Baz.query_by(bar='outer')) == 1
+            assert await Baz.query_by(bar='rolled-back') == []
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize('model', [Baz, EventBaz])
+def test_async_crud(tmp_path, model):
+    key = model.__name__.lower()
+
+    async def main():
+        async with database(tmp_path):
+            posted, code = await async_post(model, **{key: {'bar': 'post'}})
+            assert code == 201
+            id_key = key + '_id'
+            assert (await async_get_id(model, **{id_key: posted['id']})) == \
+                posted
+            _, code = await async_get_id(model, **{id_key: 'not-an-id'})
+            assert code == 404
+
+            updated = await async_put(model, **{id_key: posted['id'],
+                                                key: {'bar': 'put'}})
+            assert updated['bar'] == 'put'
+            _, code = await async_put(model, **{id_key: str(uuid.uuid4()),
+                                                key: {'bar': 'put'}})
+            assert code == 404
+            _, code = await async_put(model, **{id_key: 'not-an-id',
+                                                key: {'bar': 'put'}})
+            assert code == 404
+
+            assert await async_get(model, limit=5, fields='bar') == \
+                [{'bar': 'put'}]
+            _, code = await async_get(model, limit=-1)
+            assert code == 400
+
+            _, code = await async_delete(model, **{id_key: posted['id']})
+            assert code == 204
+            _, code = await async_delete(model, **{id_key: posted['id']})
+            assert code == 404
+
+    asyncio.run(main())
@@ -0,0 +1,73 @@
+from connexion_sql_utils import LRUCache, QueryCache
+from connexion_sql_utils.cache import TableVersions
+
+
+class FakeTimer(object):
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+    assert cache.stats() == {'hits': 3, 'misses': 1, 'evictions': 1,
+                             'expirations': 0, 'size': 2, 'currsize': 2,
+                             'maxsize': 2}
+
+
+def test_lru_cache_ttl():
+    timer = FakeTimer()
+    cache = LRUCache(ttl=10, timer=timer)
+    cache.set('a', 1)
+    timer.now = 9
+    assert cache.get('a') == 1
+    timer.now = 10
+    assert cache.get('a', 'missing') == 'missing'
+    assert cache.stats()['expirations'] == 1
+    assert len(cache) == 0
+
+
+def test_lru_cache_pop_and_clear():
+    cache = LRUCache()
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.pop('a')
+    cache.pop('not-there')
+    assert cache.get('a') is None
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_query_cache_memory_budget():
+    cache = QueryCache(max_bytes=2000)
+    value = [{'id': str(i), 'bar': 'x' * 100} for i in range(2)]
+    cache.set('a', value)
+    assert 0 < cache.currsize <= 2000
+    cache.set('b', value)
+    cache.set('c', value)
+    assert cache.currsize <= 2000
+    assert cache.get('a') is None
+    assert cache.stats()['evictions'] > 0
+
+    cache.set('big', [value] * 100)
+    assert cache.get('big') is None
+
+
+def test_table_versions():
+    versions = TableVersions()
+    assert versions.get('foo') == 0
+    assert versions.bump('foo') == 1
+    assert versions.get('foo') == 1
+    assert versions.get('bar') == 0
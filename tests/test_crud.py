@@ -1,11 +1,37 @@
 import pytest
-from connexion_sql_utils import get, post, get_id, put, delete
-from connexion_sql_utils.crud import _del_nulls, _parse_id
-
-from .conftest import Foo
+from flask import Flask
+from sqlalchemy import Column, DateTime, create_engine
+from sqlalchemy.exc import DataError
+from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import StaticPool
+from connexion_sql_utils import BaseMixin, get, post, get_id, put, delete, \
+    post_many, put_many, delete_by, QueryCache
+from connexion_sql_utils.crud import _del_nulls, _encode_cursor, _parse_id
+from connexion_sql_utils.debug import QueryCounter
+from connexion_sql_utils.serializers import MsgPackSerializer
+
+from .conftest import Foo, Versioned
+import datetime
 import json
 import uuid
 
+lite_engine = create_engine('sqlite://', poolclass=StaticPool)
+LiteSession = sessionmaker(bind=lite_engine, expire_on_commit=False)
+
+
+class LiteBase(BaseMixin):
+
+    @staticmethod
+    def session_maker():
+        return LiteSession()
+
+
+class Event(declarative_base(cls=LiteBase)):
+
+    sort_key = 'created'
+
+    created = Column(DateTime, nullable=False)
+
 
 class Invalid(object):
     pass
@@ -36,7 +62,6 @@ def test_parse_id():
 def test_post():
     foo, code = post(Foo, foo={'bar': 'baz'})
     assert code == 201
-    foo = json.loads(foo)
     assert foo['bar'] == 'baz'
     assert 'id' in foo
 
@@ -58,10 +83,64 @@ def test_get():
     assert len(get(Foo, limit=None)) >= 10
 
 
+def test_get_returns_dicts():
+    foos = get(Foo, limit=5)
+    assert all(isinstance(f, dict) for f in foos)
+    assert all(f['baz'] == 'bang' for f in foos)
+
+
+def test_get_with_offset():
+    first, second = get(Foo, limit=2)
+    assert get(Foo, limit=1, offset=1) == [second]
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'limit': -1},
+    {'limit': 2, 'offset': -1},
+    {'limit': -1, 'stream': 'ndjson'},
+    {'limit': -1, 'cursor': ''},
+])
+def test_get_returns_400_with_negative_limit_or_offset(kwargs):
+    _, code = get(Foo, **kwargs)
+    assert code == 400
+    assert len(get(Foo, limit=2)) == 2
+
+
+def test_dump_by_rolls_back_a_failed_query():
+    with pytest.raises(DataError):
+        Foo.dump_by(limit=-1)
+    # the session is not left in an aborted transaction.
+    assert isinstance(Versioned.versions_by(limit=1), list)
+
+
+def test_get_is_capped_at_max_limit():
+    Foo.max_limit = 3
+    try:
+        assert len(get(Foo, limit=100)) == 3
+        assert len(get(Foo, limit=None)) == 3
+    finally:
+        Foo.max_limit = None
+
+
+def _streamed(**kwargs):
+    resp = get(Foo, stream='ndjson', **kwargs)
+    return resp.get_data(as_text=True).splitlines()
+
+
+def test_get_stream_is_capped(monkeypatch):
+    monkeypatch.setattr(Foo, 'max_limit', 2)
+    assert len(_streamed(limit=None)) == 2
+    assert len(_streamed(limit=100)) == 2
+
+    monkeypatch.setattr(Foo, 'max_stream_limit', 4)
+    assert len(_streamed(limit=None)) == 4
+    assert len(_streamed(limit=3)) == 3
+
+
 def test_id_get():
-    foos = [json.loads(f) for f in get(Foo, limit=5)]
+    foos = get(Foo, limit=5)
     for f in foos:
-        assert json.loads(get_id(Foo, foo_id=f['id']))['id'] == f['id']
+        assert get_id(Foo, foo_id=f['id'])['id'] == f['id']
 
     _, code = get_id(Foo, foo_id=str(uuid.uuid4()))
     assert code == 404
@@ -72,12 +151,11 @@ def test_id_get():
 
 
 def test_put():
-    foo = json.loads(next(iter(get(Foo, limit=1))))
+    foo = next(iter(get(Foo, limit=1)))
     bar = foo['bar']
     assert bar != 'bang'
     foo['bar'] = 'bang'
     updated = put(Foo, foo_id=foo['id'], foo=foo)
-    updated = json.loads(updated)
     assert updated['bar'] == 'bang'
     assert updated['id'] == foo['id']
 
@@ -94,7 +172,7 @@ def test_put_fails_with_no_data_key_found():
 
 
 def test_put_returns_400_with_bad_input_data():
-    foo = json.loads(next(iter(get(Foo, limit=1))))
+    foo = next(iter(get(Foo, limit=1)))
     foo['bar'] = {}
     _, code = put(Foo, foo_id=foo['id'], foo=foo)
     assert code == 400
@@ -105,8 +183,13 @@ def test_put_returns_404_with_invalid_id():
     assert code == 404
 
 
+def test_put_returns_404_with_malformed_id():
+    _, code = put(Foo, foo_id='not an id', foo={'bar': 'nope'})
+    assert code == 404
+
+
 def test_delete():
-    foo = json.loads(next(iter(get(Foo, limit=1))))
+    foo = next(iter(get(Foo, limit=1)))
     _, code = delete(Foo, foo_id=foo['id'])
     assert code == 204
 
@@ -119,3 +202,377 @@ def test_delete_returns_404_with_invalid_id():
 def test_delete_fails_with_invalid_id_key():
     with pytest.raises(TypeError):
         delete(Foo, foo=str(uuid.uuid4()))
+
+
+def _page_ids(**kwargs):
+    ids, cursor = [], ''
+    while cursor is not None:
+        items, code, headers = get(Foo, cursor=cursor, **kwargs)
+        assert code == 200
+        ids.extend(i['id'] for i in items)
+        cursor = headers.get('X-Next-Cursor')
+    return ids
+
+
+def test_get_with_cursor():
+    expected = [f['id'] for f in get(Foo, limit=None)]
+    assert _page_ids(limit=3) == expected
+
+
+def test_get_with_cursor_and_sort_key():
+    Foo.sort_key = 'bar'
+    try:
+        expected = [str(f.id) for f in
+                    Foo.query_by().order_by(Foo.bar, Foo.id)]
+        assert _page_ids(limit=4) == expected
+    finally:
+        Foo.sort_key = None
+
+
+def test_get_with_invalid_cursor():
+    _, code = get(Foo, limit=3, cursor='not a cursor')
+    assert code == 400
+
+    # a well formed cursor, with a value that is not valid for the column.
+    _, code = get(Foo, limit=3, cursor=_encode_cursor(['not-a-uuid']))
+    assert code == 400
+
+
+def test_get_with_cursor_and_limit_zero():
+    items, code, headers = get(Foo, limit=0, cursor='')
+    assert (items, code) == ([], 200)
+    assert 'X-Next-Cursor' not in headers
+
+
+def test_get_with_cursor_and_datetime_sort_key():
+    Event.metadata.create_all(bind=lite_engine)
+    try:
+        start = datetime.datetime(2017, 3, 8, 12, 30)
+        Event.save_many([{'created': start + datetime.timedelta(minutes=i)}
+                         for i in range(5)])
+
+        created, cursor = [], ''
+        while cursor is not None:
+            items, code, headers = get(Event, limit=2, cursor=cursor)
+            assert code == 200
+            created.extend(i['created'] for i in items)
+            cursor = headers.get('X-Next-Cursor')
+        assert len(created) == 5
+        assert created == sorted(created)
+    finally:
+        Event.metadata.drop_all(bind=lite_engine)
+
+
+def test_get_stream_ndjson():
+    expected = get(Foo, limit=None)
+    resp = get(Foo, limit=None, stream='ndjson')
+    assert resp.mimetype == 'application/x-ndjson'
+    lines = resp.get_data(as_text=True).splitlines()
+    streamed = sorted((json.loads(line) for line in lines),
+                      key=lambda f: f['id'])
+    assert streamed == expected
+
+
+def test_get_stream_json_array():
+    expected = get(Foo, limit=5)
+    resp = get(Foo, limit=5, stream='json')
+    assert resp.mimetype == 'application/json'
+    assert json.loads(resp.get_data(as_text=True)) == expected
+
+    resp = get(Foo, limit=0, stream='json')
+    assert json.loads(resp.get_data(as_text=True)) == []
+
+
+def test_get_stream_is_json_with_another_serializer(monkeypatch):
+    pytest.importorskip('msgpack')
+    monkeypatch.setattr(Foo, 'serializer', MsgPackSerializer())
+    resp = get(Foo, limit=3, stream='ndjson')
+    lines = resp.get_data(as_text=True).splitlines()
+    assert len(lines) == 3
+    assert all(isinstance(json.loads(line), dict) for line in lines)
+
+
+def test_get_stream_with_invalid_format():
+    _, code = get(Foo, stream='xml')
+    assert code == 400
+
+
+def test_get_encodes_json_during_a_request():
+    expected = get(Foo, limit=2)
+    with Flask(__name__).test_request_context():
+        resp = get(Foo, limit=2)
+    assert resp.mimetype == 'application/json'
+    assert json.loads(resp.get_data(as_text=True)) == expected
+
+
+def test_get_id_negotiates_msgpack():
+    msgpack = pytest.importorskip('msgpack')
+    foo = next(iter(get(Foo, limit=1)))
+    headers = {'Accept': 'application/msgpack'}
+    with Flask(__name__).test_request_context(headers=headers):
+        resp = get_id(Foo, foo_id=foo['id'])
+    assert resp.mimetype == 'application/msgpack'
+    assert msgpack.unpackb(resp.get_data(), raw=False) == foo
+
+    headers = {'Accept': 'text/html, */*;q=0.1'}
+    with Flask(__name__).test_request_context(headers=headers):
+        resp = get_id(Foo, foo_id=foo['id'])
+    assert resp.mimetype == 'application/json'
+
+
+def test_post_encodes_during_a_request():
+    with Flask(__name__).test_request_context():
+        resp = post(Foo, foo={'bar': 'encoded'})
+    assert resp.status_code == 201
+    assert json.loads(resp.get_data(as_text=True))['bar'] == 'encoded'
+
+
+def test_get_with_fields():
+    foos = get(Foo, limit=3, fields='bar')
+    assert len(foos) == 3
+    assert all(list(f.keys()) == ['bar'] for f in foos)
+
+    foos = get(Foo, limit=3, fields=['id', 'baz'])
+    assert all(sorted(f.keys()) == ['baz', 'id'] for f in foos)
+
+
+def test_get_id_with_fields():
+    foo = next(iter(get(Foo, limit=1)))
+    assert get_id(Foo, foo_id=foo['id'], fields='id,bar') == \
+        {'id': foo['id'], 'bar': foo['bar']}
+
+
+def test_get_with_cursor_and_fields():
+    items, _, headers = get(Foo, limit=2, cursor='', fields='bar')
+    assert all(list(f.keys()) == ['bar'] for f in items)
+    items, _, _ = get(Foo, limit=2, cursor=headers['X-Next-Cursor'])
+    assert len(items) == 2
+
+
+def test_post_many():
+    resp, code = post_many(Foo, foos=[{'bar': 'many-1'}, {'bar': 'many-2'}])
+    assert code == 201
+    assert resp['errors'] == []
+    assert len(resp['ids']) == 2
+    for id in resp['ids']:
+        assert get_id(Foo, foo_id=id)['bar'].startswith('many-')
+
+
+def test_post_many_reports_invalid_items():
+    items = [{'bar': 'many-3'}, {'nope': 1}, 'not an object']
+    resp, code = post_many(Foo, foos=items)
+    assert code == 201
+    assert len(resp['ids']) == 1
+    assert [e['index'] for e in resp['errors']] == [1, 2]
+
+    resp, code = post_many(Foo, foos=[{'nope': 1}])
+    assert code == 400
+    assert resp['ids'] == []
+
+
+def test_post_many_returns_400_with_invalid_data():
+    before = Foo.query_by().count()
+    _, code = post_many(Foo, foos=[{'bar': 'many-4'}, {'bar': {}}])
+    assert code == 400
+    # the batch is inserted in a single transaction.
+    assert Foo.query_by().count() == before
+
+
+def test_post_many_fails_with_no_kwargs():
+    with pytest.raises(TypeError):
+        post_many(Foo, **{})
+
+
+def test_put_many():
+    resp, _ = post_many(Foo, foos=[{'bar': 'pm-1'}, {'bar': 'pm-2'},
+                                   {'bar': 'pm-3'}])
+    one, two, three = resp['ids']
+    missing = str(uuid.uuid4())
+    changes = [
+        {'id': one, 'changes': {'bar': 'pm-1-new'}},
+        {'id': two, 'changes': {'bar': 'pm-2-new'}},
+        {'id': three, 'changes': {'bar': None}},
+        {'id': missing, 'changes': {'bar': 'nope'}},
+        {'id': one, 'changes': {'nope': 'nope'}},
+        {'changes': {'bar': 'nope'}},
+        {'id': 'not-a-uuid', 'changes': {'bar': 'nope'}},
+    ]
+    statuses = put_many(Foo, foos=changes)
+    assert [s['status'] for s in statuses] == \
+        [200, 200, 200, 404, 400, 400, 400]
+    assert [s['id'] for s in statuses][:4] == [one, two, three, missing]
+    assert statuses[-1]['id'] == 'not-a-uuid'
+    assert 'Invalid id' in statuses[-1]['error']
+    assert get_id(Foo, foo_id=one)['bar'] == 'pm-1-new'
+    assert get_id(Foo, foo_id=two)['bar'] == 'pm-2-new'
+    assert get_id(Foo, foo_id=three)['bar'] == 'pm-3'
+
+
+def test_put_many_with_uuid_ids():
+    resp, _ = post_many(Foo, foos=[{'bar': 'pm-uuid'}])
+    (id,) = resp['ids']
+    changes = [{'id': uuid.UUID(id), 'changes': {'bar': 'pm-uuid-new'}},
+               {'id': id.upper(), 'changes': {'bar': 'pm-uuid-new'}}]
+    statuses = put_many(Foo, foos=changes)
+    assert [s['status'] for s in statuses] == [200, 200]
+    assert get_id(Foo, foo_id=id)['bar'] == 'pm-uuid-new'
+
+
+def test_put_many_returns_400_with_invalid_data():
+    foo = next(iter(get(Foo, limit=1)))
+    _, code = put_many(Foo, foos=[{'id': foo['id'], 'changes': {'bar': {}}}])
+    assert code == 400
+
+
+def test_put_many_fails_with_no_kwargs():
+    with pytest.raises(TypeError):
+        put_many(Foo, **{})
+
+
+def test_delete_by():
+    post_many(Foo, foos=[{'bar': 'delete-by'}, {'bar': 'delete-by'}])
+    assert delete_by(Foo, bar='delete-by') == {'deleted': 2}
+    assert delete_by(Foo, bar='delete-by') == {'deleted': 0}
+
+
+def test_delete_by_requires_a_filter():
+    Foo.require_delete_filter = True
+    try:
+        _, code = delete_by(Foo, bar=None)
+        assert code == 400
+    finally:
+        Foo.require_delete_filter = False
+
+
+def test_delete_by_returns_400_with_invalid_filter():
+    _, code = delete_by(Foo, nope='nope')
+    assert code == 400
+
+
+def test_put_with_orm_events():
+    foo = next(iter(get(Foo, limit=1)))
+    Foo.orm_events = True
+    try:
+        updated = put(Foo, foo_id=foo['id'], foo={'bar': 'orm-events'})
+        assert updated['bar'] == 'orm-events'
+        _, code = put(Foo, foo_id=str(uuid.uuid4()), foo={'bar': 'nope'})
+        assert code == 404
+    finally:
+        Foo.orm_events = False
+
+
+def test_delete_with_orm_events():
+    foo, _ = post(Foo, foo={'bar': 'delete-orm'})
+    Foo.orm_events = True
+    try:
+        _, code = delete(Foo, foo_id=foo['id'])
+        assert code == 204
+        _, code = delete(Foo, foo_id=foo['id'])
+        assert code == 404
+    finally:
+        Foo.orm_events = False
+
+
+def test_delete_returns_404_with_malformed_id():
+    _, code = delete(Foo, foo_id='not an id')
+    assert code == 404
+
+
+def test_get_uses_query_cache(monkeypatch):
+    cache = QueryCache()
+    monkeypatch.setattr(Foo, 'query_cache', cache)
+    post(Foo, foo={'bar': 'get-cached'})
+    assert len(get(Foo, bar='get-cached')) == 1
+    assert len(get(Foo, bar='get-cached')) == 1
+    assert cache.stats()['hits'] == 1
+    post(Foo, foo={'bar': 'get-cached'})
+    assert len(get(Foo, bar='get-cached', limit=5)) == 2
+
+
+def test_get_id_etag():
+    foo = post(Foo, foo={'bar': 'etag'})[0]
+    app = Flask(__name__)
+    with app.test_request_context():
+        resp = get_id(Foo, foo_id=foo['id'])
+    etag = resp.headers['ETag']
+    assert resp.status_code == 200
+
+    with app.test_request_context(headers={'If-None-Match': etag}):
+        resp = get_id(Foo, foo_id=foo['id'])
+    assert resp.status_code == 304
+    assert resp.get_data() == b''
+
+    put(Foo, foo_id=foo['id'], foo={'bar': 'etag-changed'})
+    with app.test_request_context(headers={'If-None-Match': etag}):
+        resp = get_id(Foo, foo_id=foo['id'])
+    assert resp.status_code == 200
+    assert resp.headers['ETag'] != etag
+
+
+def test_get_etag():
+    app = Flask(__name__)
+    with app.test_request_context():
+        etag = get(Foo, limit=2).headers['ETag']
+    with app.test_request_context(headers={'If-None-Match': etag}):
+        assert get(Foo, limit=2).status_code == 304
+    with app.test_request_context(headers={'If-None-Match': etag}):
+        assert get(Foo, limit=3).status_code == 200
+
+
+def test_version_column_etag(monkeypatch):
+    item = post(Versioned, versioned={'bar': 'v'})[0]
+    assert item['version'] == 1
+    app = Flask(__name__)
+    with app.test_request_context():
+        etag = get_id(Versioned, versioned_id=item['id']).headers['ETag']
+
+    # the version probe answers without loading the row.
+    def fail(*args, **kwargs):
+        raise AssertionError('row loaded')
+
+    with monkeypatch.context() as m:
+        m.setattr(Versioned, 'dump_id', fail)
+        with app.test_request_context(headers={'If-None-Match': etag}):
+            assert get_id(Versioned,
+                          versioned_id=item['id']).status_code == 304
+
+    with app.test_request_context():
+        list_etag = get(Versioned, bar='v').headers['ETag']
+    with monkeypatch.context() as m:
+        m.setattr(Versioned, 'dump_by', fail)
+        with app.test_request_context(headers={'If-None-Match': list_etag}):
+            assert get(Versioned, bar='v').status_code == 304
+
+    put(Versioned, versioned_id=item['id'], versioned={'bar': 'v'})
+    put(Versioned, versioned_id=item['id'], versioned={'bar': 'v2'})
+    assert get_id(Versioned, versioned_id=item['id'])['version'] == 2
+    with app.test_request_context(headers={'If-None-Match': etag}):
+        assert get_id(Versioned, versioned_id=item['id']).status_code == 200
+
+    with app.test_request_context():
+        _, code = get_id(Versioned, versioned_id=str(uuid.uuid4()))
+    assert code == 404
+
+
+def test_version_column_etag_without_if_none_match():
+    item = post(Versioned, versioned={'bar': 'v-once'})[0]
+    app = Flask(__name__)
+    # the versions are only probed for a conditional request.
+    with app.test_request_context():
+        with QueryCounter() as counter:
+            resp = get_id(Versioned, versioned_id=item['id'], fields='bar')
+        assert counter.count == 1
+        assert json.loads(resp.get_data()) == {'bar': 'v-once'}
+        etag = resp.headers['ETag']
+
+        with QueryCounter() as counter:
+            resp = get(Versioned, bar='v-once', fields='bar')
+        assert counter.count == 1
+        assert json.loads(resp.get_data()) == [{'bar': 'v-once'}]
+        list_etag = resp.headers['ETag']
+
+    with app.test_request_context(headers={'If-None-Match': etag}):
+        assert get_id(Versioned, versioned_id=item['id'],
+                      fields='bar').status_code == 304
+    with app.test_request_context(headers={'If-None-Match': list_etag}):
+        assert get(Versioned, bar='v-once', fields='bar').status_code == 304
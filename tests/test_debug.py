@@ -0,0 +1,79 @@
+import pytest
+from sqlalchemy import Column, ForeignKey, String
+from sqlalchemy.orm import relationship
+
+from connexion_sql_utils import GUID, dump_method, get, get_id
+from connexion_sql_utils.debug import NPlusOneWarning, QueryCounter, \
+    assert_max_queries, statement_shape
+
+from .conftest import Base, Foo
+
+
+class Parent(Base):
+
+    name = Column(String(), nullable=True)
+    children = relationship('Child')
+
+    @dump_method
+    def add_children(self, vals):
+        vals['children'] = [c.name for c in self.children]
+        return vals
+
+
+class Child(Base):
+
+    name = Column(String(), nullable=True)
+    parent_id = Column(GUID(), ForeignKey('parent.id'))
+
+
+@pytest.fixture()
+def parents():
+    with Parent.session_scope() as session:
+        for i in range(3):
+            parent = Parent(name='parent-{}'.format(i))
+            parent.children = [Child(name='child-{}'.format(i))]
+            session.add(parent)
+    yield
+    Child.delete_where()
+    Parent.delete_where()
+
+
+def test_statement_shape():
+    assert statement_shape(
+        "SELECT * FROM foo WHERE id = %(id_1)s AND bar IN (1, 2, 3)\n"
+        "  AND baz = 'bang' LIMIT 10") == \
+        statement_shape("SELECT * FROM foo WHERE id = %(id_1)s "
+                        "AND bar IN (4) AND baz = 'boom' LIMIT 1")
+
+
+def test_query_counter_finds_n_plus_one(parents):
+    with Parent.session_scope():
+        with QueryCounter() as counter:
+            assert len(get(Parent, limit=3)) == 3
+    assert counter.count == 4
+    assert list(counter.repeated(3).values()) == [3]
+
+
+def test_assert_max_queries():
+    foo = next(iter(get(Foo, limit=1)))
+    with assert_max_queries(1):
+        get_id(Foo, foo_id=foo['id'])
+    with pytest.raises(AssertionError):
+        with assert_max_queries(1):
+            get(Foo, limit=1)
+            get(Foo, limit=2)
+
+
+def test_assert_max_queries_n_plus_one(parents):
+    with pytest.raises(AssertionError, match='3 x SELECT'):
+        with Parent.session_scope():
+            with assert_max_queries(10, n_plus_one=3):
+                get(Parent, limit=3)
+
+
+def test_debug_queries_warns(parents, monkeypatch):
+    monkeypatch.setattr(Parent, 'debug_queries', True)
+    monkeypatch.setattr(Parent, 'n_plus_one_threshold', 3)
+    with pytest.warns(NPlusOneWarning):
+        with Parent.session_scope():
+            get(Parent, limit=3)
@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import Column, String, exc
+
+from connexion_sql_utils import Database
+
+from .conftest import URI
+
+
+@pytest.fixture()
+def db():
+    db = Database(URI, pool_size=2, max_overflow=1, pool_timeout=0.1)
+    yield db
+    db.dispose()
+
+
+def test_database_base(db):
+
+    class Qux(db.Base):
+
+        bar = Column(String(), nullable=True)
+
+    db.Base.metadata.create_all(bind=db.engine)
+    try:
+        qux = Qux(bar='database')
+        qux.save()
+        assert Qux.get_id(qux.id).bar == 'database'
+        assert Qux.current_session() is None
+        with Qux.session_scope() as session:
+            assert session is db.Session()
+    finally:
+        db.Base.metadata.drop_all(bind=db.engine)
+
+
+def test_database_warm_and_stats(db):
+    assert db.stats()['checked_in'] == 0
+    assert db.warm() == 2
+    stats = db.stats()
+    assert (stats['size'], stats['checked_in'], stats['checked_out']) == \
+        (2, 2, 0)
+
+    connections = [db.engine.connect() for _ in range(3)]
+    try:
+        stats = db.stats()
+        assert (stats['checked_out'], stats['overflow']) == (3, 1)
+        with pytest.raises(exc.TimeoutError):
+            db.engine.connect()
+    finally:
+        for connection in connections:
+            connection.close()
+
+    stats = db.stats()
+    assert stats['checked_out'] == 0
+    assert stats['peak_overflow'] == 1
+    assert stats['timeouts'] == 1
+    assert stats['wait_time'] >= 0.1
+    assert stats['checkouts'] == 6
+
+
+def test_database_read_uri():
+    db = Database(URI, read_uri=URI, pool_size=1)
+    try:
+        assert db.Base.read_session_maker() is db.ReadSession()
+        assert db.warm() == 2
+        assert db.stats()['read']['checked_in'] == 1
+    finally:
+        db.dispose()
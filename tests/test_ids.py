@@ -0,0 +1,57 @@
+import time
+import uuid
+
+import pytest
+
+from connexion_sql_utils import ids
+
+from .conftest import Foo
+
+
+def _millis(value):
+    return value.int >> 80
+
+
+def test_uuid7():
+    before = time.time_ns() // 1000000
+    values = [ids.uuid7() for _ in range(5000)]
+    after = time.time_ns() // 1000000
+
+    assert all(v.version == 7 for v in values)
+    assert all(v.variant == uuid.RFC_4122 for v in values)
+    assert values == sorted(values)
+    assert len(set(values)) == len(values)
+    assert before <= _millis(values[0]) <= _millis(values[-1]) <= after + 2
+
+
+def test_ulid():
+    before = time.time_ns() // 1000000
+    values = [ids.ulid() for _ in range(5000)]
+
+    assert values == sorted(values)
+    assert len(set(values)) == len(values)
+    assert before <= _millis(values[0])
+    # the strings sort in the same order as the values.
+    assert [str(v) for v in values] == sorted(str(v) for v in values)
+
+
+def test_get_strategy():
+    assert ids.get_strategy('uuid4') is uuid.uuid4
+    assert ids.get_strategy('uuid7') is ids.uuid7
+    assert ids.get_strategy(ids.ulid) is ids.ulid
+    with pytest.raises(ValueError):
+        ids.get_strategy('serial')
+
+
+def test_id_strategy(monkeypatch):
+    assert Foo.new_id().version == 4
+
+    monkeypatch.setattr(Foo, 'id_strategy', 'uuid7')
+    foo = Foo(bar='uuid7')
+    foo.save()
+    assert foo.id.version == 7
+
+    created = Foo.save_many([{'bar': 'uuid7-many'}] * 3)
+    assert [uuid.UUID(id).version for id in created] == [7, 7, 7]
+    assert created == sorted(created)
+    assert Foo.get_id(created[0]).bar == 'uuid7-many'
@@ -0,0 +1,59 @@
+import pytest
+
+from connexion_sql_utils import MemorySink, get, get_id, post, put
+from connexion_sql_utils import metrics
+
+from .conftest import Foo
+
+
+@pytest.fixture()
+def sink():
+    sink = metrics.enable()
+    yield sink
+    metrics.disable()
+
+
+def test_metrics_phases(sink):
+    foo, _ = post(Foo, foo={'bar': 'metrics'})
+    get(Foo, limit=2)
+    get_id(Foo, foo_id=foo['id'])
+    put(Foo, foo_id=foo['id'], foo={'bar': 'metrics-put'})
+
+    snapshot = sink.snapshot()
+    for key in (('Foo', 'post', 'query'), ('Foo', 'post', 'commit'),
+                ('Foo', 'post', 'dump'), ('Foo', 'get', 'query'),
+                ('Foo', 'get', 'hydrate'), ('Foo', 'get', 'dump'),
+                ('Foo', 'get_id', 'hydrate'), ('Foo', 'put', 'total')):
+        assert snapshot[key]['count'] == 1, key
+
+    total = snapshot[('Foo', 'get', 'total')]['sum']
+    phases = sum(snapshot[('Foo', 'get', p)]['sum']
+                 for p in ('query', 'hydrate', 'dump'))
+    assert 0 < phases <= total
+
+
+def test_metrics_disabled():
+    assert metrics.phase('dump') is metrics._no_phase
+    sink = MemorySink()
+    metrics.enable(sink)
+    metrics.disable()
+    get(Foo, limit=1)
+    assert sink.snapshot() == {}
+
+
+def test_prometheus_text():
+    sink = MemorySink(buckets=(0.1, 1.0))
+    sink.observe('Foo', 'get', 'query', 0.05)
+    sink.observe('Foo', 'get', 'query', 0.5)
+    sink.observe('Foo', 'get', 'query', 5)
+    text = metrics.prometheus_text(sink)
+    labels = 'model="Foo",operation="get",phase="query"'
+    assert '# TYPE connexion_sql_utils_seconds histogram' in text
+    assert 'connexion_sql_utils_seconds_bucket{%s,le="0.1"} 1' % labels \
+        in text
+    assert 'connexion_sql_utils_seconds_bucket{%s,le="1.0"} 2' % labels \
+        in text
+    assert 'connexion_sql_utils_seconds_bucket{%s,le="+Inf"} 3' % labels \
+        in text
+    assert 'connexion_sql_utils_seconds_count{%s} 3' % labels in text
+    assert 'connexion_sql_utils_seconds_sum{%s} 5.55' % labels in text
@@ -0,0 +1,113 @@
+import json
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from werkzeug.test import Client, create_environ
+from werkzeug.wrappers import Response
+
+from connexion_sql_utils import SessionMiddleware
+
+from .conftest import Foo, engine
+
+
+def make_app(status=200):
+    sessions = []
+
+    def app(environ, start_response):
+        sessions.append(Foo.current_session())
+        foo = Foo(bar=environ['PATH_INFO'].strip('/'))
+        foo.save()
+        sessions.append(Foo.current_session())
+        body = json.dumps(Foo.query_by(bar=foo.bar).first().dump(_dict=True))
+        return Response(body, status=status)(environ, start_response)
+
+    return SessionMiddleware(app, Foo), sessions
+
+
+def test_session_middleware_shares_a_session():
+    app, sessions = make_app()
+    resp = Client(app).get('/middleware')
+    assert resp.status_code == 200
+    assert json.loads(resp.get_data(as_text=True))['bar'] == 'middleware'
+    assert sessions[0] is not None
+    assert sessions[0] is sessions[1]
+    assert Foo.current_session() is None
+    assert Foo.query_by(bar='middleware').first() is not None
+
+
+def test_session_middleware_rolls_back_errors():
+    app, _ = make_app(status=500)
+    resp = Client(app).get('/middleware-error')
+    assert resp.status_code == 500
+    resp.close()
+    assert Foo.query_by(bar='middleware-error').first() is None
+
+
+def test_session_middleware_commits_before_responding():
+    started = []
+
+    def fail(session):
+        raise RuntimeError('commit failed')
+
+    def app(environ, start_response):
+        Foo(bar='middleware-commit').save()
+        event.listen(Foo.current_session(), 'before_commit', fail,
+                     once=True)
+        return Response('saved')(environ, start_response)
+
+    def start_response(status, headers, exc_info=None):
+        started.append(status)
+
+    body = SessionMiddleware(app, Foo)(create_environ('/'), start_response)
+    with pytest.raises(RuntimeError):
+        list(body)
+    # the failed commit is not reported as a success.
+    assert started == []
+    assert Foo.query_by(bar='middleware-commit').first() is None
+
+
+def test_session_middleware_streams_inside_of_the_scope():
+    sessions = []
+
+    def app(environ, start_response):
+        def stream():
+            sessions.append(Foo.current_session())
+            yield 'streamed'
+        return Response(stream())(environ, start_response)
+
+    resp = Client(SessionMiddleware(app, Foo)).get('/')
+    assert resp.get_data(as_text=True) == 'streamed'
+    resp.close()
+    assert sessions[0] is not None
+
+
+def test_session_middleware_sticks_clients_to_primary(monkeypatch):
+    replica = Session(bind=engine)
+    monkeypatch.setattr(Foo, 'read_session_maker',
+                        staticmethod(lambda: replica))
+    reads = []
+
+    def app(environ, start_response):
+        if environ['REQUEST_METHOD'] == 'POST':
+            Foo(bar='sticky-client').save()
+        reads.append(Foo.query_by(bar='sticky-client').session is replica)
+        return Response('')(environ, start_response)
+
+    app = SessionMiddleware(app, Foo,
+                            client_key=lambda env: env.get('HTTP_X_CLIENT'))
+    client = Client(app)
+    last_write = Foo.last_write()
+    try:
+        for (method, headers) in (('POST', {'X-Client': 'a'}),
+                                  ('GET', {'X-Client': 'a'}),
+                                  ('GET', {'X-Client': 'b'}),
+                                  ('GET', {})):
+            resp = client.open('/', method=method, headers=headers)
+            resp.get_data()
+            resp.close()
+    finally:
+        replica.close()
+    assert reads == [False, False, True, True]
+    # the writes of a request are not seen outside of it.
+    assert Foo.last_write() == last_write
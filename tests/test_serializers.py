@@ -0,0 +1,82 @@
+import datetime
+import decimal
+import json
+import uuid
+
+import pytest
+
+from connexion_sql_utils import serializers
+from connexion_sql_utils.serializers import JSONSerializer, \
+    MsgPackSerializer
+
+
+ID = uuid.uuid4()
+NOW = datetime.datetime(2017, 3, 8, 12, 30)
+
+VALUES = {
+    'id': ID,
+    'price': decimal.Decimal('1.5'),
+    'created': NOW,
+    'day': NOW.date(),
+}
+
+EXPECTED = {
+    'id': str(ID),
+    'price': '1.5',
+    'created': '2017-03-08T12:30:00',
+    'day': '2017-03-08',
+}
+
+
+@pytest.mark.parametrize('fast', [True, False])
+def test_json_serializer(fast):
+    serializer = JSONSerializer(fast=fast)
+    dumped = serializer.dumps(VALUES)
+    assert isinstance(dumped, str)
+    assert json.loads(dumped) == EXPECTED
+
+
+@pytest.mark.parametrize('fast', [True, False])
+@pytest.mark.parametrize('value', [{1: 'a', 'b': 2}, {'n': 2 ** 70}])
+def test_json_serializer_encodes_what_json_encodes(fast, value):
+    dumped = JSONSerializer(fast=fast).dumps(value)
+    assert json.loads(dumped) == json.loads(json.dumps(value))
+
+
+@pytest.mark.parametrize('fast', [True, False])
+def test_json_serializer_keeps_decimal_precision(fast):
+    value = {'price': decimal.Decimal('12345678901234567.89')}
+    assert json.loads(JSONSerializer(fast=fast).dumps(value)) == \
+        {'price': '12345678901234567.89'}
+    assert json.loads(JSONSerializer(fast=fast, decimal=float).dumps(
+        {'price': decimal.Decimal('1.5')})) == {'price': 1.5}
+
+
+def test_json_serializer_fails_with_unknown_types():
+    for serializer in (JSONSerializer(), JSONSerializer(fast=False)):
+        with pytest.raises(TypeError):
+            serializer.dumps({'value': object()})
+
+
+def test_msgpack_serializer():
+    msgpack = pytest.importorskip('msgpack')
+    dumped = MsgPackSerializer().dumps(VALUES)
+    assert msgpack.unpackb(dumped, raw=False) == EXPECTED
+    dumped = MsgPackSerializer(decimal=float).dumps(VALUES)
+    assert msgpack.unpackb(dumped, raw=False)['price'] == 1.5
+
+
+def test_register():
+    class Text(object):
+        mimetype = 'text/plain'
+
+        def dumps(self, obj):
+            return str(obj)
+
+    text = Text()
+    serializers.register(text)
+    try:
+        assert text in serializers.registered()
+    finally:
+        del(serializers._registry[text.mimetype])
+    assert text not in serializers.registered()
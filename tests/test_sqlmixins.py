@@ -1,12 +1,16 @@
 
 import pytest
 
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from connexion_sql_utils import BaseMixin, BaseMixinABC, get, event_func, \
-    to_json
-from .conftest import Foo
+    to_json, LRUCache, QueryCache
+from connexion_sql_utils.debug import QueryCounter
+from connexion_sql_utils.sqlmixins import _last_writes
+from .conftest import Foo, ServerFoo, engine, session
 
 import json
+import uuid
 
 
 def test_save():
@@ -51,10 +55,11 @@ def test_update_with_session():
 
 
 def test_get_id():
-    foo = json.loads(next(iter(get(Foo, limit=1))))
+    foo = next(iter(get(Foo, limit=1)))
     assert foo['id'] is not None
     queried = Foo.get_id(foo['id'])
-    assert queried.id == foo['id']
+    assert isinstance(queried.id, uuid.UUID)
+    assert str(queried.id) == foo['id']
     assert Foo.get_id(1000) is None
 
 
@@ -137,6 +142,16 @@ def test_dump():
     assert dumped == {"bar": "data", "baz": "bang"}
 
 
+def test_dump_many():
+    foos = [Foo(bar='one'), Foo(bar='two')]
+    dumped = Foo.dump_many(foos)
+    assert isinstance(dumped, str)
+    assert json.loads(dumped) == [{'bar': 'one', 'baz': 'bang'},
+                                  {'bar': 'two', 'baz': 'bang'}]
+    assert Foo.dump_many(foos, _dict=True) == json.loads(dumped)
+    assert Foo.dump_many([]) == '[]'
+
+
 def test_delete():
     foo = Foo(bar='my data')
     foo.save()
@@ -178,3 +193,268 @@ def test_dump_method():
     loaded = json.loads(foo.dump())
     assert 'baz' in loaded
     assert loaded['baz'] == 'bang'
+
+
+def test_dump_plan():
+    plan = Foo._get_dump_plan()
+    assert plan == ((), ('add_baz',))
+    # the plan is only built once per class.
+    assert Foo._get_dump_plan() is plan
+    assert 'add_baz' not in BaseMixin._get_dump_plan()[1]
+
+
+def test_query_by_with_fields():
+    with Foo.session_scope() as session:
+        foo = Foo.query_by(session=session, fields=('id',)).first()
+        assert 'id' in vars(foo)
+        assert 'bar' not in vars(foo)
+
+
+def test_dump_with_fields():
+    foo = Foo(bar='data')
+    assert foo.dump(_dict=True, fields=['baz']) == {'baz': 'bang'}
+    assert json.loads(foo.dump(fields=['bar', 'missing'])) == {'bar': 'data'}
+
+
+def test_delete_where():
+    Foo(bar='delete-where').save()
+    assert Foo.delete_where(bar='delete-where') == 1
+    assert Foo.query_by(bar='delete-where').first() is None
+
+    Foo.require_delete_filter = True
+    try:
+        with pytest.raises(ValueError):
+            Foo.delete_where()
+    finally:
+        Foo.require_delete_filter = False
+
+
+def test_update_id():
+    foo = Foo(bar='update-id')
+    foo.save()
+    updated = Foo.update_id(foo.id, {'bar': 'update-id-new', 'nope': 'no'})
+    assert isinstance(updated, Foo)
+    assert updated.id == foo.id
+    assert updated.bar == 'update-id-new'
+    assert Foo.get_id(foo.id).bar == 'update-id-new'
+
+    # nothing changes, so the table version is not bumped.
+    version = Foo.table_version()
+    assert Foo.update_id(foo.id, {'bar': 'update-id-new'}).bar == \
+        'update-id-new'
+    assert Foo.update_id(foo.id, {'id': foo.id}).bar == 'update-id-new'
+
+    assert Foo.update_id(str(uuid.uuid4()), {'bar': 'nope'}) is None
+    assert Foo.table_version() == version
+
+
+def test_delete_id():
+    foo = Foo(bar='delete-id')
+    foo.save()
+    assert Foo.delete_id(foo.id) is True
+    assert Foo.get_id(foo.id) is None
+    assert Foo.delete_id(foo.id) is False
+
+
+def test_session_scope_is_reentrant():
+    assert Foo.current_session() is None
+    with Foo.session_scope() as outer:
+        assert Foo.current_session() is outer
+        with Foo.session_scope() as inner:
+            assert inner is outer
+        Foo(bar='reentrant').save()
+        assert Foo.query_by(bar='reentrant', session=None).first() is not None
+    assert Foo.current_session() is None
+    assert Foo.query_by(bar='reentrant').first() is not None
+
+
+def test_nested_session_scope_rolls_back_to_savepoint():
+    with Foo.session_scope():
+        Foo(bar='outer-kept').save()
+        with pytest.raises(Exception):
+            Foo(bar={}).save()
+        Foo(bar='outer-kept-2').save()
+
+    assert Foo.query_by(bar='outer-kept').first() is not None
+    assert Foo.query_by(bar='outer-kept-2').first() is not None
+
+
+@pytest.fixture()
+def id_cache(monkeypatch):
+    cache = LRUCache()
+    monkeypatch.setattr(Foo, 'id_cache', cache)
+    return cache
+
+
+def test_dump_id_reads_through_cache(id_cache):
+    foo = Foo(bar='cached')
+    foo.save()
+    assert Foo.dump_id(foo.id)['bar'] == 'cached'
+    assert Foo.dump_id(foo.id, fields=('bar',)) == {'bar': 'cached'}
+    assert Foo.dump_id(uuid.uuid4()) is None
+    stats = id_cache.stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (1, 2, 1)
+
+    # the forms of the same id share an entry.
+    assert Foo.dump_id(str(foo.id).upper())['bar'] == 'cached'
+    assert id_cache.stats()['hits'] == 2
+
+
+def test_dump_id_returns_a_copy_of_the_cache(id_cache):
+    foo = Foo(bar='cached-copy')
+    foo.save()
+    Foo.dump_id(foo.id)['bar'] = 'changed'
+    Foo.dump_id(foo.id)['bar'] = 'changed'
+    assert Foo.dump_id(foo.id)['bar'] == 'cached-copy'
+    assert id_cache.stats()['hits'] == 2
+
+
+def test_writes_invalidate_cache(id_cache):
+    foo = Foo(bar='cached')
+    foo.save()
+
+    Foo.dump_id(foo.id)
+    foo.update(bar='cached-update')
+    assert Foo.dump_id(foo.id)['bar'] == 'cached-update'
+
+    Foo.update_id(foo.id, {'bar': 'cached-update-id'})
+    assert Foo.dump_id(foo.id)['bar'] == 'cached-update-id'
+
+    Foo.update_many({foo.id: {'bar': 'cached-update-many'}})
+    assert Foo.dump_id(foo.id)['bar'] == 'cached-update-many'
+
+    foo.delete()
+    assert Foo.dump_id(foo.id) is None
+
+
+def test_orm_events_invalidate_cache(id_cache):
+    foo = Foo(bar='cached-event')
+    foo.save()
+    Foo.dump_id(foo.id)
+
+    with Foo.session_scope() as session:
+        instance = Foo.get_id(foo.id, session=session)
+        instance.bar = 'cached-event-new'
+    assert len(id_cache) == 0
+    assert Foo.dump_id(foo.id)['bar'] == 'cached-event-new'
+
+    Foo.delete_where(bar='cached-event-new')
+    assert Foo.dump_id(foo.id) is None
+
+
+@pytest.fixture()
+def query_cache(monkeypatch):
+    cache = QueryCache()
+    monkeypatch.setattr(Foo, 'query_cache', cache)
+    return cache
+
+
+def test_dump_by_reads_through_cache(query_cache):
+    Foo(bar='query-cached').save()
+    first = Foo.dump_by(bar='query-cached')
+    assert [f['bar'] for f in first] == ['query-cached']
+    assert Foo.dump_by(bar='query-cached') == first
+    assert Foo.dump_by(bar='query-cached', fields=('bar',)) == \
+        [{'bar': 'query-cached'}]
+    stats = query_cache.stats()
+    assert (stats['hits'], stats['misses']) == (1, 2)
+
+
+def test_dump_by_returns_copies_of_the_cache(query_cache):
+    Foo(bar='query-cached-copy').save()
+    Foo.dump_by(bar='query-cached-copy')[0]['bar'] = 'changed'
+    Foo.dump_by(bar='query-cached-copy')[0]['bar'] = 'changed'
+    assert Foo.dump_by(bar='query-cached-copy')[0]['bar'] == \
+        'query-cached-copy'
+    assert query_cache.stats()['hits'] == 2
+
+
+def test_writes_bump_table_version(query_cache):
+    version = Foo.table_version()
+    Foo.dump_by(bar='query-cached-2')
+    Foo(bar='query-cached-2').save()
+    assert Foo.table_version() > version
+    assert len(Foo.dump_by(bar='query-cached-2')) == 1
+
+    Foo.save_many([{'bar': 'query-cached-2'}])
+    assert len(Foo.dump_by(bar='query-cached-2')) == 2
+
+    Foo.delete_where(bar='query-cached-2')
+    assert Foo.dump_by(bar='query-cached-2') == []
+
+
+def test_uncommitted_writes_are_not_cached(query_cache):
+    with Foo.session_scope() as session:
+        Foo(bar='query-cached-3').save()
+        session.flush()
+        version = Foo.table_version()
+        assert len(Foo.dump_by(bar='query-cached-3')) == 1
+        assert len(query_cache) == 0
+    # the version is bumped again on commit.
+    assert Foo.table_version() > version
+    assert len(Foo.dump_by(bar='query-cached-3')) == 1
+    assert len(query_cache) == 1
+
+
+@pytest.fixture()
+def replica(monkeypatch):
+    replica = Session(bind=engine)
+    monkeypatch.setattr(Foo, 'read_session_maker',
+                        staticmethod(lambda: replica))
+    token = _last_writes.set({})
+    yield replica
+    _last_writes.reset(token)
+    replica.close()
+
+
+def test_reads_use_read_session_maker(replica):
+    assert Foo.query_by(bar='replica').session is replica
+    assert Foo.query_by(bar='replica', session=session).session is session
+
+    with Foo.session_scope() as primary:
+        assert Foo.query_by(bar='replica').session is replica
+        Foo(bar='replica').save()
+        # uncommitted writes are only visible on the primary.
+        assert Foo.query_by(bar='replica').session is primary
+
+
+def test_reads_stick_to_primary_after_a_write(replica, monkeypatch):
+    assert Foo.last_write() is None
+    Foo(bar='sticky').save()
+    assert Foo.last_write() is not None
+    query = Foo.query_by(bar='sticky')
+    assert query.session is not replica
+    assert query.first() is not None
+
+    monkeypatch.setattr(Foo, 'read_after_write_window', 0)
+    assert Foo.query_by(bar='sticky').session is replica
+
+
+def test_server_id():
+    assert event.contains(Foo, 'before_insert', Foo.create_id)
+    assert not event.contains(ServerFoo, 'before_insert',
+                              ServerFoo.create_id)
+    assert ServerFoo.__table__.c.id.server_default is not None
+
+    foo = ServerFoo(bar='server')
+    foo.save()
+    assert isinstance(foo.id, uuid.UUID)
+    assert ServerFoo.get_id(foo.id).bar == 'server'
+
+
+def test_server_id_inserts_are_batched():
+    with QueryCounter() as counter:
+        with ServerFoo.session_scope() as session:
+            foos = [ServerFoo(bar='batched-{}'.format(i)) for i in range(5)]
+            session.add_all(foos)
+    inserts = [s for s in counter.statements if s.startswith('INSERT')]
+    assert len(inserts) == 1
+    assert len(set(f.id for f in foos)) == 5
+
+    items = [{'bar': 'many-{}'.format(i)} for i in range(5)]
+    with QueryCounter() as counter:
+        ids = ServerFoo.save_many(items)
+    assert len([s for s in counter.statements
+                if s.startswith('INSERT')]) == 1
+    assert [ServerFoo.get_id(id).bar for id in ids] == \
+        [item['bar'] for item in items]
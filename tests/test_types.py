@@ -0,0 +1,112 @@
+import json
+import uuid
+
+import pytest
+from sqlalchemy import Column, ForeignKey, String, create_engine, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from connexion_sql_utils import BaseMixin, GUID
+from connexion_sql_utils.types import as_uuid
+
+from .conftest import Foo, engine
+
+lite_engine = create_engine('sqlite://', poolclass=StaticPool)
+Session = sessionmaker(bind=lite_engine, expire_on_commit=False)
+
+
+class LiteBase(BaseMixin):
+
+    @staticmethod
+    def session_maker():
+        return Session()
+
+
+Base = declarative_base(cls=LiteBase)
+
+
+class Gadget(Base):
+
+    bar = Column(String(), nullable=True)
+
+
+class ServerGadget(Base):
+
+    server_id = True
+
+    bar = Column(String(), nullable=True)
+
+
+class Part(Base):
+
+    gadget_id = Column(GUID(), ForeignKey('gadget.id'), nullable=False)
+
+
+@pytest.fixture(scope='module', autouse=True)
+def tables():
+    Base.metadata.create_all(bind=lite_engine)
+    yield
+    Base.metadata.drop_all(bind=lite_engine)
+
+
+def test_as_uuid():
+    value = uuid.uuid4()
+    assert as_uuid(value) is value
+    assert as_uuid(str(value)) == value
+    assert as_uuid(str(value).upper()) == value
+    assert as_uuid(value.bytes) == value
+    with pytest.raises(ValueError):
+        as_uuid('not a uuid')
+
+
+def test_guid_is_binary_on_sqlite():
+    gadget = Gadget(bar='gadget')
+    gadget.save()
+    assert isinstance(gadget.id, uuid.UUID)
+
+    with lite_engine.connect() as conn:
+        (raw,) = conn.execute(text('SELECT id FROM gadget')).first()
+    assert raw == gadget.id.bytes
+
+    assert Gadget.get_id(gadget.id).bar == 'gadget'
+    assert Gadget.get_id(str(gadget.id).upper()).id == gadget.id
+    assert Gadget.get_id('not a uuid') is None
+
+
+def test_guid_dumps_as_string():
+    gadget = Gadget(bar='dumped')
+    gadget.save()
+    part = Part(gadget_id=str(gadget.id))
+    part.save()
+
+    loaded = Part.get_id(part.id)
+    assert loaded.gadget_id == gadget.id
+    assert loaded.dump(_dict=True) == {'id': str(part.id),
+                                       'gadget_id': str(gadget.id)}
+    assert json.loads(loaded.dump())['gadget_id'] == str(gadget.id)
+    assert Part._uuid_keys() == ('gadget_id', 'id')
+
+
+def test_server_id_on_sqlite():
+    gadget = ServerGadget(bar='server')
+    gadget.save()
+    assert isinstance(gadget.id, uuid.UUID)
+
+    with lite_engine.connect() as conn:
+        (raw,) = conn.execute(text(
+            "SELECT id FROM servergadget WHERE bar = 'server'")).first()
+    assert raw == gadget.id.bytes
+
+    items = [{'bar': 'many-{}'.format(i)} for i in range(3)]
+    ids = ServerGadget.save_many(items)
+    assert [ServerGadget.get_id(id).bar for id in ids] == \
+        [item['bar'] for item in items]
+
+
+def test_guid_is_native_on_postgres():
+    impl = Foo.__table__.c.id.type.load_dialect_impl(engine.dialect)
+    assert isinstance(impl, postgresql.UUID)
+    foo = Foo(bar='native')
+    foo.save()
+    assert isinstance(Foo.get_id(str(foo.id)).id, uuid.UUID)